@@ -0,0 +1,72 @@
+"""
+Shared headless Chromium for HTML -> PDF rendering.
+One browser is launched lazily and reused for every render; each render only
+opens (and closes) a page. The browser lives on a persistent event loop in a
+daemon thread, so callers on any thread or event loop can use it.
+"""
+
+import asyncio
+import atexit
+import threading
+from typing import Optional
+
+_playwright = None
+_browser = None
+_browser_lock: Optional[asyncio.Lock] = None
+_RENDER_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_RENDER_LOOP_LOCK = threading.Lock()
+
+
+async def get_browser():
+    """Return the shared browser; must be awaited on the render loop (see run_render)."""
+    global _playwright, _browser, _browser_lock
+    if _browser_lock is None:
+        _browser_lock = asyncio.Lock()
+    # Concurrent renders share the loop; only the first one launches Chromium.
+    async with _browser_lock:
+        if _browser is None or not _browser.is_connected():
+            from playwright.async_api import async_playwright
+            if _playwright is not None:
+                await _playwright.stop()
+            _playwright = await async_playwright().start()
+            _browser = await _playwright.chromium.launch()
+    return _browser
+
+
+async def _close_browser():
+    global _playwright, _browser
+    if _browser is not None:
+        await _browser.close()
+    if _playwright is not None:
+        await _playwright.stop()
+    _browser = _playwright = None
+
+
+def _shutdown_renderer():
+    if _RENDER_LOOP is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_close_browser(), _RENDER_LOOP).result(timeout=10)
+    finally:
+        _RENDER_LOOP.call_soon_threadsafe(_RENDER_LOOP.stop)
+
+
+def _render_loop() -> asyncio.AbstractEventLoop:
+    global _RENDER_LOOP
+    with _RENDER_LOOP_LOCK:
+        if _RENDER_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="pdf-render", daemon=True).start()
+            _RENDER_LOOP = loop
+            atexit.register(_shutdown_renderer)
+        return _RENDER_LOOP
+
+
+def run_render(coro):
+    """Run `coro` on the render loop and block for its result. Safe from any thread."""
+    return asyncio.run_coroutine_threadsafe(coro, _render_loop()).result()
+
+
+async def run_render_async(coro):
+    """Await `coro` on the render loop from another event loop without blocking it."""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _render_loop()))
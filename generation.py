@@ -5,23 +5,28 @@ and Playwright-based PDF rendering with ReportLab fallback.
 """
 
 import asyncio
+import functools
+import hashlib
 import html
 import os
 import re
+import sys
 import tempfile
+import threading
 import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
-import google.generativeai as genai
-from PyPDF2 import PdfReader
-from playwright.async_api import async_playwright
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+import pypdfium2 as pdfium
+
+from browser_pool import get_browser, run_render
+from llm_cache import CACHE_ENABLED, CachedGemini
+
+# google.generativeai, playwright and reportlab are imported where they are
+# first used: they are slow to import and not every run needs all of them.
 
 
 # ======================================================
@@ -33,11 +38,15 @@ api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GENAI_API_KEY")
 if not api_key:
     raise ValueError("❌ GEMINI_API_KEY or GENAI_API_KEY not found in .env file!")
 
-genai.configure(api_key=api_key)
 print("✅ Gemini API Key loaded successfully!\n")
+_genai_configured = False
 
+MCQ_MODEL_NAME = "gemini-2.5-pro"
+EMBEDDING_MODEL_NAME = "models/text-embedding-004"
 SUPPORTED_LANGUAGES = ["English", "Telugu", "Hindi", "Odia"]
 STRICT_LANGUAGES = {"hindi", "odia"}
+REPORTLAB_SAFE_LANGUAGES = {"english"}
+FORCE_PLAYWRIGHT = os.getenv("FORCE_PLAYWRIGHT", "").strip().lower() in {"1", "true", "yes"}
 LANG_DISPLAY = {
     "english": "English",
     "telugu": "Telugu",
@@ -48,6 +57,51 @@ DEFAULT_OUTPUT_DIR = Path("outputs")
 DEFAULT_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 SCRIPT_DIR = Path(__file__).parent.resolve()
 FONTS_DIR = SCRIPT_DIR / "fonts"
+# Per-language (ReportLab font name, TTF file in FONTS_DIR); English uses the
+# built-in Helvetica / system sans. Odia ships as Anek Odia.
+FONT_MAP: Dict[str, Tuple[str, Optional[str]]] = {
+    "english": ("Helvetica", None),
+    "telugu": ("NotoSansTelugu", "NotoSansTelugu-Regular.ttf"),
+    "hindi": ("TiroDevanagariHindi", "TiroDevanagariHindi-Regular.ttf"),
+    "odia": ("AnekOdia", "AnekOdia-Regular.ttf"),
+}
+# Font files resolved once at import; languages whose file is missing are absent.
+_RESOLVED_FONTS: Dict[str, Tuple[str, Path]] = {
+    lang: (name, FONTS_DIR / filename)
+    for lang, (name, filename) in FONT_MAP.items()
+    if filename and (FONTS_DIR / filename).is_file()
+}
+PDF_TEXT_CACHE_SIZE = 32
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+# Source text sent to Gemini is capped by estimated tokens, not characters:
+# Latin text packs ~4 characters per token, Indic scripts about one.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "2500"))
+ASCII_CHARS_PER_TOKEN = 4.0
+NON_ASCII_CHARS_PER_TOKEN = 1.0
+# No script packs more than ASCII_CHARS_PER_TOKEN, so nothing past this many
+# characters can survive the token-budget truncation.
+SOURCE_CHAR_LIMIT = int(PROMPT_TOKEN_BUDGET * ASCII_CHARS_PER_TOKEN)
+
+# Extracted text keyed by a BLAKE2b digest of the PDF bytes, so re-uploads of
+# the same document (new timestamped path, same content) skip re-parsing. The
+# on-disk copy survives restarts and is shared by every process of the app.
+PDF_TEXT_CACHE_DIR = Path(os.getenv("PDF_TEXT_CACHE_DIR", "outputs/.text_cache"))
+# Disk entries older than this, or beyond the newest PDF_TEXT_CACHE_MAX_FILES,
+# are pruned whenever a new entry is written.
+PDF_TEXT_CACHE_TTL_SECONDS = float(os.getenv("PDF_TEXT_CACHE_TTL", str(30 * 24 * 3600)))
+PDF_TEXT_CACHE_MAX_FILES = int(os.getenv("PDF_TEXT_CACHE_MAX_FILES", "256"))
+_PDF_TEXT_CACHE: Dict[Tuple[str, Optional[int]], str] = {}
+
+
+# ======================================================
+# Regex patterns (compiled once)
+# ======================================================
+_QUESTION_NUMBER_RE = re.compile(r"^\d+\.")
+_QUESTION_LINE_RE = re.compile(r"^(\d+)\.\s*(.+\?)")
+_OPTION_MARKER_RE = re.compile(r"^[A-D]\)")
+_QUESTION_SPACING_RE = re.compile(r"(\d+)\.(?!\s)")
+_OPTION_SPACING_RE = re.compile(r"([A-D])\)(?!\s)")
+_BOLD_RE = re.compile(r"\*\*(.*?)\*\*")
 
 
 # ======================================================
@@ -61,27 +115,129 @@ def ensure_supported_language(language: str) -> str:
     return normalized
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    reader = PdfReader(pdf_path)
-    parts = []
-    for page in reader.pages:
-        parts.append(page.extract_text() or "")
-    return "\n".join(parts).strip()
+def _extract_page_texts(pdf_bytes: bytes, max_chars: Optional[int] = None) -> List[str]:
+    """Page texts in order; with `max_chars`, stop once that much text is collected."""
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        texts = []
+        total = 0
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range().replace("\r\n", "\n"))
+            textpage.close()
+            page.close()
+            total += len(texts[-1])
+            if max_chars is not None and total >= max_chars:
+                break
+        return texts
+    finally:
+        pdf.close()
+
+
+def pdf_digest(pdf_path: str) -> str:
+    """Content digest used to key cached PDF text; callers may compute it once and pass it along."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _prune_text_cache() -> None:
+    entries = []
+    for path in PDF_TEXT_CACHE_DIR.glob("*.txt"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    entries.sort(reverse=True)
+    cutoff = time.time() - PDF_TEXT_CACHE_TTL_SECONDS
+    for rank, (mtime, path) in enumerate(entries):
+        if rank >= PDF_TEXT_CACHE_MAX_FILES or mtime < cutoff:
+            path.unlink(missing_ok=True)
+
+
+def extract_text_from_pdf(pdf_path: str,
+                          max_chars: Optional[int] = None,
+                          digest: Optional[str] = None) -> str:
+    """Extract the PDF's text; with `max_chars`, stop reading pages once that much is collected."""
+    digest = digest or pdf_digest(pdf_path)
+    cache_key = (digest, max_chars)
+    cached = _PDF_TEXT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    disk_path = PDF_TEXT_CACHE_DIR / f"{digest}_{max_chars or 'all'}.txt"
+    if disk_path.exists():
+        text = disk_path.read_text(encoding="utf-8")
+        # Refresh the mtime so pruning drops least recently used entries first.
+        try:
+            os.utime(disk_path)
+        except OSError:
+            pass
+    else:
+        pdf_bytes = Path(pdf_path).read_bytes()
+        text = "\n".join(_extract_page_texts(pdf_bytes, max_chars))
+        if max_chars is not None:
+            text = text[:max_chars]
+        text = text.strip()
+        PDF_TEXT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _prune_text_cache()
+        # Write-then-rename so a concurrent reader never sees a partial file.
+        tmp_path = disk_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, disk_path)
+
+    if len(_PDF_TEXT_CACHE) >= PDF_TEXT_CACHE_SIZE:
+        _PDF_TEXT_CACHE.pop(next(iter(_PDF_TEXT_CACHE)))
+    _PDF_TEXT_CACHE[cache_key] = text
+    return text
 
 
-def normalize_unicode_digits(text: str | None) -> str:
-    if not text:
-        return ""
-    chars = []
-    for ch in text:
+@functools.lru_cache(maxsize=None)
+def _unicode_digit_table() -> Dict[int, str]:
+    # Every non-ASCII decimal digit (Devanagari, Odia, Telugu, ...) -> ASCII,
+    # built on first use so importing the module stays cheap.
+    table = {}
+    for codepoint in range(sys.maxunicode + 1):
+        ch = chr(codepoint)
         if ch.isdigit() and not ch.isascii():
             try:
-                chars.append(str(unicodedata.digit(ch)))
-                continue
+                table[codepoint] = str(unicodedata.digit(ch))
             except (TypeError, ValueError):
                 pass
-        chars.append(ch)
-    return "".join(chars)
+    return table
+
+
+def normalize_unicode_digits(text: str | None) -> str:
+    if not text:
+        return ""
+    return text.translate(_unicode_digit_table())
+
+
+def estimate_tokens(text: str) -> float:
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return ascii_chars / ASCII_CHARS_PER_TOKEN + (len(text) - ascii_chars) / NON_ASCII_CHARS_PER_TOKEN
+
+
+def truncate_to_token_budget(text: str, budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """Keep the longest run of leading paragraphs that fits the token budget."""
+    if estimate_tokens(text) <= budget:
+        return text
+    kept: List[str] = []
+    used = 0.0
+    for paragraph in text.split("\n\n"):
+        cost = estimate_tokens(paragraph) + 1
+        if used + cost > budget:
+            if not kept:
+                # A single oversized paragraph: cut it at the budget's character equivalent.
+                chars_per_token = len(paragraph) / max(cost - 1, 1)
+                kept.append(paragraph[:int(budget * chars_per_token)])
+            break
+        kept.append(paragraph)
+        used += cost
+    return "\n\n".join(kept)
 
 
 def clean_text_html(value: str | None) -> str:
@@ -128,17 +284,10 @@ Answer: B
     return ""
 
 
-def build_prompt(source_text: str,
-                 num_questions: int,
-                 target_language: str,
-                 topic: Optional[str],
-                 input_mode: str) -> str:
+@functools.lru_cache(maxsize=None)
+def build_system_instruction(target_language: str) -> str:
+    """Static role + format rules; identical for every request in a language."""
     language_display = LANG_DISPLAY[target_language]
-    topic_clause = (
-        f"- Focus strictly on the topic: \"{topic}\"."
-        if topic else
-        "- Use the most relevant parts of the source material."
-    )
     strict_block = ""
     if target_language in STRICT_LANGUAGES:
         strict_block = f"""
@@ -154,24 +303,50 @@ FOLLOW THIS EXAMPLE:
     return f"""
 You are an expert exam-question generator.
 
-Document mode: {input_mode.upper()}
-{topic_clause}
-
-Generate **exactly {num_questions}** multiple-choice questions in {language_display}.
-
 Non-negotiable format:
 1. Question line: "<number>. <question?>"
 2. Option lines: "A) ...", "B) ...", "C) ...", "D) ..."
 3. Answer line: "Answer: X"
 
-{strict_block}
+{strict_block}"""
+
+
+_PROMPT_TEMPLATE = """
+Document mode: {input_mode}
+{topic_clause}
+
+Generate **exactly {num_questions}** multiple-choice questions in {language_display}.
 
 Source content (truncated):
-{source_text[:10000]}
+{source_text}
 
 Begin now."""
 
 
+def build_prompt(source_text: str,
+                 num_questions: int,
+                 target_language: str,
+                 topic: Optional[str],
+                 input_mode: str) -> Tuple[str, str]:
+    """
+    Return (system_instruction, request_prompt); only the latter varies per call.
+    `source_text` is used as given: _prepare_source has already cut it to the token budget.
+    """
+    topic_clause = (
+        f"- Focus strictly on the topic: \"{topic}\"."
+        if topic else
+        "- Use the most relevant parts of the source material."
+    )
+    prompt = _PROMPT_TEMPLATE.format_map({
+        "input_mode": input_mode.upper(),
+        "topic_clause": topic_clause,
+        "num_questions": num_questions,
+        "language_display": LANG_DISPLAY[target_language],
+        "source_text": source_text,
+    })
+    return build_system_instruction(target_language), prompt
+
+
 # ======================================================
 # Gemini interaction + post processing
 # ======================================================
@@ -184,22 +359,19 @@ def debug_raw_output(text: str, language: str):
 def fix_missing_option_markers(text: str) -> str:
     if not text:
         return ""
-    lines = text.splitlines()
     corrected: List[str] = []
-    for line in lines:
+    # Options seen since the last question line; restores dropped "A"-"D" letters.
+    option_count = 0
+    for line in text.splitlines():
         stripped = line.strip()
-        if stripped.startswith(")") and len(stripped) > 1:
+        if _QUESTION_NUMBER_RE.match(stripped):
             option_count = 0
-            for prev in reversed(corrected):
-                prev_line = prev.strip()
-                if re.match(r"^\d+\.", prev_line):
-                    break
-                if re.match(r"^[A-D]\)", prev_line):
-                    option_count += 1
-            if option_count < 4:
-                next_letter = chr(65 + option_count)
-                corrected.append(f"{next_letter}{stripped}")
-                continue
+        elif _OPTION_MARKER_RE.match(stripped):
+            option_count += 1
+        elif stripped.startswith(")") and len(stripped) > 1 and option_count < 4:
+            corrected.append(f"{chr(65 + option_count)}{stripped}")
+            option_count += 1
+            continue
         corrected.append(line)
     return "\n".join(corrected)
 
@@ -223,8 +395,91 @@ def correct_output(text: str, language: str) -> str:
         return ""
     text = fix_missing_option_markers(text)
     text = fix_missing_answers(text)
-    text = re.sub(r"(\d+)\.(?!\s)", r"\1. ", text)
-    text = re.sub(r"([A-D])\)(?!\s)", r"\1) ", text)
+    text = _QUESTION_SPACING_RE.sub(r"\1. ", text)
+    text = _OPTION_SPACING_RE.sub(r"\1) ", text)
+    return text
+
+
+def _genai():
+    global _genai_configured
+    import google.generativeai as genai
+    if not _genai_configured:
+        genai.configure(api_key=api_key)
+        _genai_configured = True
+    return genai
+
+
+def _embed_prompt(text: str) -> List[float]:
+    return _genai().embed_content(model=EMBEDDING_MODEL_NAME, content=text)["embedding"]
+
+
+@functools.lru_cache(maxsize=8)
+def _get_model(name: str = MCQ_MODEL_NAME, system_instruction: Optional[str] = None):
+    # One model per (name, system instruction) pair; there is one instruction per language.
+    return _genai().GenerativeModel(name, system_instruction=system_instruction)
+
+
+@functools.lru_cache(maxsize=1)
+def _response_cache() -> CachedGemini:
+    return CachedGemini(MCQ_MODEL_NAME, embed=_embed_prompt)
+
+
+def stream_mcq_text(num_questions: int,
+                    language: str,
+                    source_text: str,
+                    topic: Optional[str],
+                    mode: str) -> Iterator[str]:
+    """Yield raw Gemini output chunks as they arrive (or the cached response)."""
+    system_instruction, prompt = build_prompt(source_text, num_questions, language, topic, mode)
+    cache_text = f"{system_instruction}\n\n{prompt}"
+    scope = f"mcq:{language}:{num_questions}"
+    if CACHE_ENABLED:
+        cached = _response_cache().get(cache_text, scope)
+        if cached is not None:
+            yield cached
+            return
+
+    model = _get_model(MCQ_MODEL_NAME, system_instruction)
+    parts = []
+    for chunk in model.generate_content(prompt, stream=True):
+        if chunk.text:
+            parts.append(chunk.text)
+            yield chunk.text
+    if CACHE_ENABLED:
+        _response_cache().put(cache_text, "".join(parts), scope)
+
+
+async def astream_mcq_text(num_questions: int,
+                           language: str,
+                           source_text: str,
+                           topic: Optional[str],
+                           mode: str) -> AsyncIterator[str]:
+    """Async counterpart of stream_mcq_text built on generate_content_async."""
+    system_instruction, prompt = build_prompt(source_text, num_questions, language, topic, mode)
+    cache_text = f"{system_instruction}\n\n{prompt}"
+    scope = f"mcq:{language}:{num_questions}"
+    if CACHE_ENABLED:
+        # SQLite (and a semantic-cache embedding call) would block the event loop.
+        cached = await asyncio.to_thread(_response_cache().get, cache_text, scope)
+        if cached is not None:
+            yield cached
+            return
+
+    model = _get_model(MCQ_MODEL_NAME, system_instruction)
+    parts = []
+    response = await model.generate_content_async(prompt, stream=True)
+    async for chunk in response:
+        if chunk.text:
+            parts.append(chunk.text)
+            yield chunk.text
+    if CACHE_ENABLED:
+        await asyncio.to_thread(_response_cache().put, cache_text, "".join(parts), scope)
+
+
+def finalize_mcq_text(text: str, language: str) -> str:
+    debug_raw_output(text, language)
+    if language in STRICT_LANGUAGES:
+        text = correct_output(text, language)
     return text
 
 
@@ -233,14 +488,8 @@ def generate_mcq_text(num_questions: int,
                       source_text: str,
                       topic: Optional[str],
                       mode: str) -> str:
-    prompt = build_prompt(source_text, num_questions, language, topic, mode)
-    model = genai.GenerativeModel("gemini-2.5-pro")
-    response = model.generate_content(prompt)
-    text = response.text or ""
-    debug_raw_output(text, language)
-    if language in STRICT_LANGUAGES:
-        text = correct_output(text, language)
-    return text
+    text = "".join(stream_mcq_text(num_questions, language, source_text, topic, mode))
+    return finalize_mcq_text(text, language)
 
 
 # ======================================================
@@ -255,7 +504,7 @@ def parse_mcq_text(text: str) -> List[Dict[str, str]]:
         stripped = line.strip()
         if not stripped:
             continue
-        q_match = re.match(r"^(\d+)\.\s*(.+\?)", stripped)
+        q_match = _QUESTION_LINE_RE.match(stripped)
         if q_match:
             if current:
                 questions.append(current)
@@ -266,7 +515,7 @@ def parse_mcq_text(text: str) -> List[Dict[str, str]]:
                 "answer": "",
             }
             continue
-        if current and re.match(r"^[A-D]\)", stripped):
+        if current and _OPTION_MARKER_RE.match(stripped):
             current["options"].append(stripped)
             continue
         if current and stripped.lower().startswith("answer"):
@@ -281,9 +530,9 @@ async def render_pdf_playwright(html_content: str, output_path: Path):
     tmpdir = tempfile.mkdtemp()
     html_path = Path(tmpdir) / "mcqs.html"
     html_path.write_text(html_content, encoding="utf-8")
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
+    browser = await get_browser()
+    page = await browser.new_page()
+    try:
         await page.goto(html_path.resolve().as_uri())
         await page.pdf(
             path=str(output_path),
@@ -291,29 +540,22 @@ async def render_pdf_playwright(html_content: str, output_path: Path):
             margin={"top": "1cm", "right": "1cm", "bottom": "1cm", "left": "1cm"},
             print_background=True,
         )
-        await browser.close()
+    finally:
+        await page.close()
 
 
 def build_html_document(questions: List[Dict[str, str]], language: str, raw_text: str) -> str:
-    font_map = {
-        "english": None,
-        "telugu": "NotoSansTelugu-Regular.ttf",
-        "hindi": "TiroDevanagariHindi-Regular.ttf",
-        "odia": "NotoSansOriya-Regular.ttf",
-    }
-    font_file = font_map.get(language)
     font_face = ""
     body_font = "Arial, sans-serif"
-    if font_file:
-        abs_path = (FONTS_DIR / font_file)
-        if abs_path.exists():
-            font_face = f"""
-            @font-face {{
-                font-family: 'LangFont';
-                src: url('{abs_path.resolve().as_uri()}') format('truetype');
-            }}
-            """
-            body_font = "LangFont, Arial, sans-serif"
+    if language in _RESOLVED_FONTS:
+        abs_path = _RESOLVED_FONTS[language][1]
+        font_face = f"""
+        @font-face {{
+            font-family: 'LangFont';
+            src: url('{abs_path.resolve().as_uri()}') format('truetype');
+        }}
+        """
+        body_font = "LangFont, Arial, sans-serif"
 
     css = f"""
     {font_face}
@@ -371,63 +613,173 @@ def build_html_document(questions: List[Dict[str, str]], language: str, raw_text
     """
 
 
+@functools.lru_cache(maxsize=None)
+def _ensure_font(name: str, path: Path) -> str:
+    # Registering parses the whole TTF, so do it once per process. ReportLab
+    # embeds TTFs as subsets, so each PDF only carries the glyphs it uses.
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    pdfmetrics.registerFont(TTFont(name, str(path), subfontIndex=0))
+    return name
+
+
+@functools.lru_cache(maxsize=1)
+def _font_coverage() -> Dict[str, frozenset]:
+    # Built-in Helvetica covers the WinAnsi (cp1252) repertoire; TTF coverage
+    # comes from each face's cmap, loaded once per process.
+    from reportlab.pdfbase import pdfmetrics
+
+    coverage = {"Helvetica": frozenset(bytes(range(0x20, 0x100)).decode("cp1252", errors="ignore"))}
+    # Every bundled font doubles as a fallback for the others, in FONT_MAP order
+    # (e.g. a Hindi question quoting Telugu or Odia text).
+    for name, path in _RESOLVED_FONTS.values():
+        _ensure_font(name, path)
+        coverage[name] = frozenset(chr(code) for code in pdfmetrics.getFont(name).face.charToGlyph)
+    return coverage
+
+
+def _font_fallback_markup(line: str, primary: str) -> str:
+    """Escape `line` as Paragraph markup, wrapping runs the primary font can't draw in <font> tags."""
+    coverage = _font_coverage()
+    primary_chars = coverage.get(primary)
+    if primary_chars is None:
+        from reportlab.pdfbase import pdfmetrics
+        primary_chars = frozenset(chr(code) for code in pdfmetrics.getFont(primary).face.charToGlyph)
+
+    runs: List[Tuple[str, List[str]]] = []
+    for ch in line:
+        if ch.isspace() or ch in primary_chars:
+            font = runs[-1][0] if ch.isspace() and runs else primary
+        else:
+            font = next((name for name, chars in coverage.items() if ch in chars), primary)
+        if runs and runs[-1][0] == font:
+            runs[-1][1].append(ch)
+        else:
+            runs.append((font, [ch]))
+
+    return "".join(
+        html.escape("".join(chars), quote=False) if font == primary
+        else f'<font name="{font}">{html.escape("".join(chars), quote=False)}</font>'
+        for font, chars in runs
+    )
+
+
 def save_pdf(text: str, outpath: Path, lang: str) -> bool:
+    # Latin-only output renders fine with ReportLab's built-in Helvetica, so
+    # only scripts that need complex shaping pay for the Chromium render.
+    if lang in REPORTLAB_SAFE_LANGUAGES and not FORCE_PLAYWRIGHT:
+        return _save_pdf_reportlab(text, outpath, lang)
+
     questions = parse_mcq_text(text)
     html_content = build_html_document(questions, lang, text)
     try:
-        asyncio.run(render_pdf_playwright(html_content, outpath))
+        run_render(render_pdf_playwright(html_content, outpath))
         return True
     except Exception as exc:
         print(f"Playwright rendering failed: {exc}, falling back to ReportLab.")
-
-    clean_text = re.sub(r"\*\*(.*?)\*\*", r"\1", text)
-    font_map = {
-        "english": ("Helvetica", None),
-        "telugu": ("NotoSansTelugu", "fonts/NotoSansTelugu-Regular.ttf"),
-        "hindi": ("TiroDevanagariHindi", "fonts/TiroDevanagariHindi-Regular.ttf"),
-        "odia": ("NotoSansOriya", "fonts/NotoSansOriya-Regular.ttf"),
-    }
-    font_name, font_file = font_map.get(lang, ("Helvetica", None))
-    if font_file and (FONTS_DIR / Path(font_file).name).exists():
-        pdfmetrics.registerFont(TTFont(font_name, str(FONTS_DIR / Path(font_file).name)))
-    else:
-        font_name = "Helvetica"
-
-    c = canvas.Canvas(str(outpath), pagesize=A4)
-    c.setFont(font_name, 12)
-    width, height = A4
-    y = height - 60
-    for line in clean_text.splitlines():
-        if y < 60:
-            c.showPage()
-            c.setFont(font_name, 12)
-            y = height - 60
-        c.drawString(40, y, line[:150])
-        y -= 18
-    c.save()
+    return _save_pdf_reportlab(text, outpath, lang)
+
+
+def _save_pdf_reportlab(text: str, outpath: Path, lang: str) -> bool:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    clean_text = _BOLD_RE.sub(r"\1", text)
+    font_name = "Helvetica"
+    if lang in _RESOLVED_FONTS:
+        font_name = _ensure_font(*_RESOLVED_FONTS[lang])
+
+    # Platypus handles line breaking by measured glyph width and pagination,
+    # and emits each paragraph's lines as one text object.
+    body = ParagraphStyle("mcq_body", fontName=font_name, fontSize=12, leading=18)
+    flowables = [
+        Paragraph(_font_fallback_markup(line, font_name), body) if line.strip() else Spacer(1, body.leading)
+        for line in clean_text.splitlines()
+    ]
+    doc = SimpleDocTemplate(str(outpath), pagesize=A4, pageCompression=1,
+                            leftMargin=40, rightMargin=40, topMargin=48, bottomMargin=48)
+    doc.build(flowables)
     return True
 
 
 # ======================================================
 # Public API
 # ======================================================
+def _prepare_source(pdf_path: Optional[str],
+                    topic: Optional[str],
+                    custom_context: Optional[str],
+                    digest: Optional[str] = None) -> Tuple[str, str]:
+    if pdf_path:
+        source_text = extract_text_from_pdf(pdf_path, max_chars=SOURCE_CHAR_LIMIT, digest=digest)
+        if not source_text:
+            raise ValueError("⚠️ No readable text found in the PDF! Make sure it’s not just scanned images.")
+        return truncate_to_token_budget(source_text), "pdf"
+    source_text = (custom_context or topic or "").strip()
+    if not source_text:
+        raise ValueError("⚠️ Provide either a PDF or dynamic text to generate MCQs.")
+    return truncate_to_token_budget(source_text), "text"
+
+
+def stream_mcqs_content(pdf_path: Optional[str],
+                        n: int,
+                        language: str,
+                        topic: Optional[str] = None,
+                        custom_context: Optional[str] = None) -> Iterator[str]:
+    """Streaming counterpart of generate_mcqs_content: yields raw (uncorrected) chunks."""
+    language_code = ensure_supported_language(language)
+    source_text, mode = _prepare_source(pdf_path, topic, custom_context)
+    yield from stream_mcq_text(n, language_code, source_text, topic, mode)
+
+
 def generate_mcqs_content(pdf_path: Optional[str],
                           n: int,
                           language: str,
                           topic: Optional[str] = None,
-                          custom_context: Optional[str] = None) -> str:
+                          custom_context: Optional[str] = None,
+                          on_chunk: Optional[Callable[[str], None]] = None) -> str:
+    parts = []
+    for chunk in stream_mcqs_content(pdf_path, n, language, topic, custom_context):
+        parts.append(chunk)
+        if on_chunk:
+            on_chunk(chunk)
+    return finalize_mcq_text("".join(parts), ensure_supported_language(language))
+
+
+async def astream_mcqs_content(pdf_path: Optional[str],
+                               n: int,
+                               language: str,
+                               topic: Optional[str] = None,
+                               custom_context: Optional[str] = None,
+                               pdf_digest: Optional[str] = None) -> AsyncIterator[str]:
+    """Async counterpart of stream_mcqs_content; PDF extraction runs off the event loop."""
     language_code = ensure_supported_language(language)
-    if pdf_path:
-        source_text = extract_text_from_pdf(pdf_path)
-        if not source_text:
-            raise ValueError("⚠️ No readable text found in the PDF! Make sure it’s not just scanned images.")
-        mode = "pdf"
-    else:
-        source_text = (custom_context or topic or "").strip()
-        if not source_text:
-            raise ValueError("⚠️ Provide either a PDF or dynamic text to generate MCQs.")
-        mode = "text"
-    return generate_mcq_text(n, language_code, source_text, topic, mode)
+    source_text, mode = await asyncio.to_thread(_prepare_source, pdf_path, topic, custom_context, pdf_digest)
+    async for chunk in astream_mcq_text(n, language_code, source_text, topic, mode):
+        yield chunk
+
+
+def generate_mcqs_batch(pdf_path: Optional[str],
+                        n: int,
+                        languages: List[str],
+                        topic: Optional[str] = None,
+                        custom_context: Optional[str] = None) -> Dict[str, str]:
+    """Generate the same MCQ request in several languages with concurrent Gemini calls."""
+    # Extract once up front so the workers all hit the text cache.
+    _prepare_source(pdf_path, topic, custom_context)
+    unique = list(dict.fromkeys(languages))
+    with ThreadPoolExecutor(max_workers=max(1, min(GEMINI_CONCURRENCY, len(unique)))) as executor:
+        futures = {
+            language: executor.submit(generate_mcqs_content, pdf_path, n, language, topic, custom_context)
+            for language in unique
+        }
+        return {language: future.result() for language, future in futures.items()}
+
+
+def _mcq_pdf_path(output_dir: Path, pdf_path: Optional[str], language: str) -> Path:
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    safe_name = Path(pdf_path).stem[:30].replace(" ", "_") if pdf_path else "custom_text"
+    return output_dir / f"mcqs_{safe_name}_{language.lower()}_{timestamp}.pdf"
 
 
 def run_mcq_pipeline(pdf_path: Optional[str],
@@ -435,19 +787,44 @@ def run_mcq_pipeline(pdf_path: Optional[str],
                      language: str,
                      topic: Optional[str] = None,
                      custom_context: Optional[str] = None,
-                     output_dir: Path | str = DEFAULT_OUTPUT_DIR) -> Tuple[str, Optional[str]]:
+                     output_dir: Path | str = DEFAULT_OUTPUT_DIR,
+                     on_chunk: Optional[Callable[[str], None]] = None) -> Tuple[str, Optional[str]]:
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    mcq_text = generate_mcqs_content(pdf_path, num_questions, language, topic, custom_context)
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    safe_name = Path(pdf_path).stem[:30].replace(" ", "_") if pdf_path else "custom_text"
-    pdf_name = f"mcqs_{safe_name}_{language.lower()}_{timestamp}.pdf"
-    out_path = output_dir / pdf_name
+    mcq_text = generate_mcqs_content(pdf_path, num_questions, language, topic, custom_context, on_chunk)
+    out_path = _mcq_pdf_path(output_dir, pdf_path, language)
     pdf_ok = save_pdf(mcq_text, out_path, ensure_supported_language(language))
     return mcq_text, str(out_path if pdf_ok else "")
 
 
+async def astream_mcq_pipeline(pdf_path: Optional[str],
+                               num_questions: int,
+                               language: str,
+                               topic: Optional[str] = None,
+                               custom_context: Optional[str] = None,
+                               output_dir: Path | str = DEFAULT_OUTPUT_DIR,
+                               pdf_digest: Optional[str] = None) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    Progressive run_mcq_pipeline for UIs: yields (raw_text_so_far, None) while
+    Gemini streams, then one final (corrected_text, pdf_path) once the PDF is saved.
+    Pass `pdf_digest` (from pdf_digest()) to skip re-hashing an already-seen upload.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    language_code = ensure_supported_language(language)
+
+    parts = []
+    async for chunk in astream_mcqs_content(pdf_path, num_questions, language, topic, custom_context, pdf_digest):
+        parts.append(chunk)
+        yield "".join(parts), None
+
+    mcq_text = finalize_mcq_text("".join(parts), language_code)
+    out_path = _mcq_pdf_path(output_dir, pdf_path, language)
+    pdf_ok = await asyncio.to_thread(save_pdf, mcq_text, out_path, language_code)
+    yield mcq_text, str(out_path if pdf_ok else "")
+
+
 # ======================================================
 # CLI (optional)
 # ======================================================
@@ -470,7 +847,8 @@ def cli_main():
     dynamic_text = input("📝 Optional custom passage (press Enter to skip): ").strip() or None
 
     print("\n🧠 Generating MCQs using Gemini 2.5 Pro... please wait\n")
-    mcqs, pdf_path = run_mcq_pipeline(pdf_path or None, num_qs, lang, topic, dynamic_text)
+    mcqs, pdf_path = run_mcq_pipeline(pdf_path or None, num_qs, lang, topic, dynamic_text,
+                                      on_chunk=lambda chunk: print(chunk, end="", flush=True))
     if mcqs:
         print(f"\n✅ Generation complete. PDF: {pdf_path}")
     else:
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import shutil
 import textwrap
@@ -13,7 +14,7 @@ from translation import (
     LANG_NAME_TO_CODE,
 )
 from solution import run_solution_pipeline, LANGUAGES as SOLUTION_LANGUAGES
-from generation import run_mcq_pipeline, SUPPORTED_LANGUAGES as MCQ_LANGUAGES
+from generation import astream_mcq_pipeline, pdf_digest, SUPPORTED_LANGUAGES as MCQ_LANGUAGES
 
 BASE_UI_DIR = Path("ui_workspace")
 UPLOAD_DIR = BASE_UI_DIR / "uploads"
@@ -38,20 +39,40 @@ TOPIC_OPTIONS = [
 ]
 
 
+def _fast_copy(source_path: str, target_path: Path) -> int:
+    """Copy an upload into UPLOAD_DIR and return its size; raises FileNotFoundError if it is gone."""
+    size = os.stat(source_path).st_size
+    try:
+        # Same filesystem: a hard link shares the data instead of copying it.
+        os.link(source_path, target_path)
+        return size
+    except OSError:
+        pass
+    if hasattr(os, "sendfile"):
+        with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        return size
+    shutil.copyfile(source_path, target_path)
+    return size
+
+
 def _copy_uploaded_file(file) -> Tuple[str | None, str]:
     if not file:
         return None, "⚠️ Please upload a PDF to get started."
 
     source_path = getattr(file, "name", None) or file
     original_name = getattr(file, "orig_name", None) or os.path.basename(source_path)
-    if not os.path.exists(source_path):
-        return None, "⚠️ Unable to read the uploaded file. Please try again."
-
     timestamp = time.strftime("%Y%m%d_%H%M%S")
     target_path = UPLOAD_DIR / f"{timestamp}_{original_name}"
-    shutil.copy(source_path, target_path)
-
-    file_size_mb = os.path.getsize(target_path) / (1024 * 1024)
+    try:
+        file_size_mb = _fast_copy(source_path, target_path) / (1024 * 1024)
+    except FileNotFoundError:
+        return None, "⚠️ Unable to read the uploaded file. Please try again."
     info = textwrap.dedent(
         f"""
         ✅ **File received**
@@ -70,10 +91,12 @@ def _ensure_pdf(pdf_path: str | None) -> Tuple[bool, str]:
 
 
 def handle_file_upload(file):
-    return _copy_uploaded_file(file)
+    pdf_path, info = _copy_uploaded_file(file)
+    # Hash once per upload; the MCQ tab keys its extracted-text cache on it.
+    return pdf_path, pdf_digest(pdf_path) if pdf_path else None, info
 
 
-def trigger_translation(pdf_path: str | None, language_name: str):
+async def trigger_translation(pdf_path: str | None, language_name: str):
     ok, message = _ensure_pdf(pdf_path)
     if not ok:
         return message, None
@@ -88,11 +111,20 @@ def trigger_translation(pdf_path: str | None, language_name: str):
     translation_json_dir.mkdir(parents=True, exist_ok=True)
 
     try:
-        result = run_full_pipeline(
+        # Language-independent extraction output is shared by every target language,
+        # so switching languages reuses it in place instead of re-extracting.
+        # run_full_pipeline extracts each PDF once under a per-PDF lock and swaps
+        # the file in atomically, so concurrent language runs can share this path.
+        extracted_json = TRANSLATION_DIR / f"{Path(pdf_path).stem}_extracted.json"
+        # The translation pipeline is synchronous and CPU-heavy; run it on a
+        # worker thread so the event loop keeps serving the other tabs.
+        result = await asyncio.to_thread(
+            run_full_pipeline,
             pdf_path=pdf_path,
             languages=[lang_code],
             include_images=True,
             image_handling="metadata",
+            extracted_json_path=str(extracted_json),
             translated_dir=str(translation_json_dir),
             output_dir=str(translation_output_dir),
             overlay=True,
@@ -114,13 +146,14 @@ def trigger_translation(pdf_path: str | None, language_name: str):
         return f"❌ Translation failed:\n```\n{exc}\n```", None
 
 
-def trigger_solution(pdf_path: str | None, language_name: str):
+async def trigger_solution(pdf_path: str | None, language_name: str):
     ok, message = _ensure_pdf(pdf_path)
     if not ok:
         return message, None
 
     try:
-        result = run_solution_pipeline(
+        result = await asyncio.to_thread(
+            run_solution_pipeline,
             pdf_path=pdf_path,
             target_language=language_name,
             output_dir=str(SOLUTION_DIR),
@@ -139,48 +172,56 @@ def trigger_solution(pdf_path: str | None, language_name: str):
         return f"❌ Solution generation failed:\n```\n{exc}\n```", None
 
 
-def trigger_mcq_generation(pdf_path: str | None,
-                           mode: str,
-                           num_questions: int,
-                           language_name: str,
-                           topic_choice: str,
-                           custom_topic: str,
-                           dynamic_text: str):
+async def trigger_mcq_generation(pdf_path: str | None,
+                                 source_digest: str | None,
+                                 mode: str,
+                                 num_questions: int,
+                                 language_name: str,
+                                 topic_choice: str,
+                                 custom_topic: str,
+                                 dynamic_text: str):
     if mode == "pdf":
         ok, message = _ensure_pdf(pdf_path)
         if not ok:
-            return message, "", None
+            yield message, "", None
+            return
         source_pdf = pdf_path
     else:
         source_pdf = None
         final_topic = (custom_topic.strip() or topic_choice or "").strip()
         if not (dynamic_text.strip() or final_topic):
-            return "⚠️ Provide a topic or some custom text when using text-only mode.", "", None
+            yield "⚠️ Provide a topic or some custom text when using text-only mode.", "", None
+            return
 
     final_topic = custom_topic.strip() or (topic_choice.strip() if isinstance(topic_choice, str) else "")
     context_payload = dynamic_text.strip() or final_topic
     try:
-        mcq_text, pdf_file = run_mcq_pipeline(
+        async for mcq_text, pdf_file in astream_mcq_pipeline(
             pdf_path=source_pdf,
             num_questions=num_questions,
             language=language_name,
             topic=final_topic,
             custom_context=context_payload,
             output_dir=str(MCQ_DIR),
-        )
-        preview = mcq_text.replace("Answer:", "**Answer:**")
-        summary = textwrap.dedent(
-            f"""
-            ✅ Generated {num_questions} MCQs
-            - Language: **{language_name}**
-            - Mode: **{"PDF" if source_pdf else "Text-only"}**
-            - Topic: **{final_topic or 'Derived from input'}**
-            - PDF: `{pdf_file}`
-            """
-        ).strip()
-        return summary, preview, pdf_file if pdf_file else None
+            pdf_digest=source_digest if source_pdf else None,
+        ):
+            preview = mcq_text.replace("Answer:", "**Answer:**")
+            if pdf_file is None:
+                yield "⏳ Generating MCQs...", preview, None
+                continue
+
+            summary = textwrap.dedent(
+                f"""
+                ✅ Generated {num_questions} MCQs
+                - Language: **{language_name}**
+                - Mode: **{"PDF" if source_pdf else "Text-only"}**
+                - Topic: **{final_topic or 'Derived from input'}**
+                - PDF: `{pdf_file}`
+                """
+            ).strip()
+            yield summary, preview, pdf_file if pdf_file else None
     except Exception as exc:
-        return f"❌ MCQ generation failed:\n```\n{exc}\n```", "", None
+        yield f"❌ MCQ generation failed:\n```\n{exc}\n```", "", None
 
 
 with gr.Blocks(theme=gr.themes.Soft()) as demo:
@@ -193,12 +234,13 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
     )
 
     pdf_state = gr.State()
+    pdf_digest_state = gr.State()
 
     with gr.Row():
         pdf_input = gr.File(label="Upload a PDF", file_types=[".pdf"], file_count="single")
         file_info = gr.Markdown("⬆️ Upload a PDF to get started.")
 
-    pdf_input.upload(handle_file_upload, pdf_input, outputs=[pdf_state, file_info])
+    pdf_input.upload(handle_file_upload, pdf_input, outputs=[pdf_state, pdf_digest_state, file_info])
 
     with gr.Tab("Translation"):
         translation_language = gr.Dropdown(
@@ -261,11 +303,15 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
 
         mcq_button.click(
             trigger_mcq_generation,
-            inputs=[pdf_state, mcq_mode, mcq_count, mcq_language, topic_dropdown, custom_topic, dynamic_text],
+            inputs=[pdf_state, pdf_digest_state, mcq_mode, mcq_count, mcq_language, topic_dropdown, custom_topic, dynamic_text],
             outputs=[mcq_status, mcq_preview, mcq_download],
+            api_name="generate_mcqs",
         )
 
-demo.queue()
+# Every handler is async (blocking pipelines run via asyncio.to_thread), so one
+# event loop can keep many requests in flight. Gemini calls stay capped for the
+# whole process by solution.GEMINI_LIMITER, however many runs are queued.
+demo.queue(default_concurrency_limit=32)
 
 
 if __name__ == "__main__":
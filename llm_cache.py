@@ -0,0 +1,202 @@
+"""
+Persistent Gemini response cache.
+Exact-match lookups are keyed by the SHA-256 of (model, prompt); an optional
+semantic tier returns a stored response whose prompt embedding is close enough
+(cosine similarity) to the new prompt's embedding. Prompt embeddings are
+persisted too, keyed by the prompt's hash, so repeat probes skip the embed call.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", "outputs/.llm_cache"))
+CACHE_ENABLED = os.getenv("LLM_CACHE", "1").strip().lower() not in {"0", "false", "no"}
+SEMANTIC_CACHE_ENABLED = os.getenv("LLM_SEMANTIC_CACHE", "").strip().lower() in {"1", "true", "yes"}
+SEMANTIC_THRESHOLD = float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.92"))
+# Stored prompt embeddings older than this are pruned when a cache is opened.
+EMBEDDING_TTL_SECONDS = float(os.getenv("LLM_EMBEDDING_TTL", str(30 * 24 * 3600)))
+
+EmbedFn = Callable[[str], Sequence[float]]
+
+
+def prompt_key(model_name: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model_name}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class _VectorIndex:
+    """Normalised embeddings stacked in one float32 matrix that grows in powers of two."""
+
+    def __init__(self):
+        self.vecs: Optional[np.ndarray] = None
+        self.keys: List[str] = []
+
+    def add(self, key: str, vector: np.ndarray) -> None:
+        count = len(self.keys)
+        if self.vecs is None:
+            self.vecs = np.empty((16, vector.shape[0]), dtype=np.float32)
+        elif count == self.vecs.shape[0]:
+            grown = np.empty((count * 2, self.vecs.shape[1]), dtype=np.float32)
+            grown[:count] = self.vecs
+            self.vecs = grown
+        self.vecs[count] = vector
+        self.keys.append(key)
+
+    def best(self, query: np.ndarray) -> Tuple[Optional[str], float]:
+        if not self.keys:
+            return None, 0.0
+        similarities = self.vecs[:len(self.keys)] @ query
+        best = int(similarities.argmax())
+        return self.keys[best], float(similarities[best])
+
+
+class CachedGemini:
+    """
+    Two-tier response cache backed by SQLite.
+
+    `scope` partitions semantic lookups (e.g. by target language and question
+    count) so a near-identical prompt for a different output never matches.
+    Semantic lookups need an `embed` callable and are off unless enabled.
+    """
+
+    def __init__(self,
+                 model_name: str,
+                 db_path: Path | str = CACHE_DIR / "responses.sqlite3",
+                 embed: Optional[EmbedFn] = None,
+                 semantic: bool = SEMANTIC_CACHE_ENABLED,
+                 threshold: float = SEMANTIC_THRESHOLD):
+        self.model_name = model_name
+        self.db_path = Path(db_path)
+        self.embed = embed
+        self.semantic = semantic and embed is not None
+        self.threshold = threshold
+        # A miss embeds the prompt during get() and stores it in put(); keep
+        # recent vectors so that is one embedding call, not two.
+        self._recent_embeddings: Dict[str, np.ndarray] = {}
+        # Instances are shared by worker threads (generate_mcqs_batch, asyncio.to_thread);
+        # guards _recent_embeddings and the _indexes vectors. Never held across embed().
+        self._lock = threading.Lock()
+        # Per-scope similarity indexes, loaded from SQLite on a scope's first
+        # semantic lookup and appended to by put() from then on.
+        self._indexes: Dict[str, _VectorIndex] = {}
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            # WAL lets concurrent readers proceed while another worker writes.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    embedding BLOB,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("DELETE FROM embeddings WHERE created_at < ?", (time.time() - EMBEDDING_TTL_SECONDS,))
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation keeps this safe across threads.
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _embedding(self, prompt: str) -> np.ndarray:
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            vector = self._recent_embeddings.get(key)
+        if vector is not None:
+            return vector
+
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row:
+            vector = np.frombuffer(row[0], dtype=np.float32)
+        else:
+            # Normalised once on store, so cosine similarity is a plain dot product.
+            vector = np.asarray(self.embed(prompt), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else vector
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                    (key, vector.tobytes(), time.time()),
+                )
+
+        with self._lock:
+            if len(self._recent_embeddings) >= 64:
+                self._recent_embeddings.pop(next(iter(self._recent_embeddings)))
+            self._recent_embeddings[key] = vector
+        return vector
+
+    def _index(self, conn: sqlite3.Connection, scope: str) -> _VectorIndex:
+        # Caller holds self._lock.
+        index = self._indexes.get(scope)
+        if index is None:
+            index = _VectorIndex()
+            rows = conn.execute(
+                "SELECT key, embedding FROM responses WHERE scope = ? AND embedding IS NOT NULL",
+                (scope,),
+            )
+            for key, blob in rows:
+                index.add(key, np.frombuffer(blob, dtype=np.float32))
+            self._indexes[scope] = index
+        return index
+
+    def get(self, prompt: str, scope: str = "") -> Optional[str]:
+        key = prompt_key(self.model_name, prompt)
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                return row[0]
+            if not self.semantic:
+                return None
+            with self._lock:
+                index = self._index(conn, scope)
+                if not index.keys:
+                    return None
+
+            query = self._embedding(prompt)
+            with self._lock:
+                best_key, similarity = index.best(query)
+            if similarity < self.threshold:
+                return None
+            row = conn.execute("SELECT response FROM responses WHERE key = ?", (best_key,)).fetchone()
+        if row:
+            print(f"♻️  Semantic cache hit (similarity {similarity:.3f})")
+            return row[0]
+        return None
+
+    def put(self, prompt: str, response: str, scope: str = "") -> None:
+        if not response:
+            return
+        key = prompt_key(self.model_name, prompt)
+        vector = self._embedding(prompt) if self.semantic else None
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, scope, response, embedding, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, scope, response, vector.tobytes() if vector is not None else None, time.time()),
+            )
+        if vector is not None:
+            with self._lock:
+                index = self._indexes.get(scope)
+                if index is not None and key not in index.keys:
+                    index.add(key, vector)
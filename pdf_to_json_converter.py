@@ -127,6 +127,14 @@ def merge_fragmented_text_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str,
     
     merged_blocks = []
     current_block = None
+    current_parts = []
+    
+    def flush_current():
+        # Join collected fragments once instead of growing the string per character
+        if len(current_parts) > 1:
+            current_block['content'] = "".join(current_parts)
+            current_block['word_count'] = len(current_block['content'].split())
+        merged_blocks.append(current_block)
     
     for block in blocks:
         content = block.get('content', '').strip()
@@ -143,24 +151,24 @@ def merge_fragmented_text_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str,
         if is_fragment:
             if current_block:
                 # Merge with current block
-                current_block['content'] += content
+                current_parts.append(content)
                 # Update position to include the merged character
                 current_block['position']['x1'] = block['position']['x1']
                 current_block['position']['width'] = current_block['position']['x1'] - current_block['position']['x0']
-                current_block['word_count'] = len(current_block['content'].split())
             else:
                 # Start new merged block
                 current_block = block.copy()
+                current_parts = [current_block.get('content', '')]
         else:
             # Non-fragment block
             if current_block:
-                merged_blocks.append(current_block)
+                flush_current()
                 current_block = None
             merged_blocks.append(block)
     
     # Don't forget the last merged block
     if current_block:
-        merged_blocks.append(current_block)
+        flush_current()
     
     return merged_blocks
 
@@ -359,11 +367,11 @@ class EnhancedBarChartDetector:
     def _analyze_surrounding_context(self, text_blocks):
         """Analyze surrounding text for chart indicators"""
         context_score = 0
-        relevant_text = ""
+        relevant_parts = []
         
         for block in text_blocks:
             content = block.get('content', '').lower()
-            relevant_text += " " + content
+            relevant_parts.append(content)
             
             # Direct chart mentions
             if any(keyword in content for keyword in self.chart_keywords):
@@ -378,6 +386,7 @@ class EnhancedBarChartDetector:
                 context_score += 0.1
         
         # Check for exam acronyms in context
+        relevant_text = " " + " ".join(relevant_parts)
         if any(acronym in relevant_text for acronym in ['mts', 'cgl', 'chsl']):
             context_score += 0.2
         
@@ -1,10 +1,10 @@
 
 """
-Unified pipeline (NO OCR):
+Unified pipeline (NO OCR), streamed stage to stage:
 1) Extract text + images from input PDF (PyMuPDF)
 2) Solve equations via SymPy (simple) or fallback to Gemini LLM for MCQs
 3) Translate solved items into selected language via Gemini
-4) Render final translated JSON -> PDF via Playwright
+4) Render final translated JSON -> PDF via WeasyPrint (Playwright if unavailable)
 Notes:
 - Final PDF contains translated text (no images embedded).
 - Requires GENAI_API_KEY and GENAI_MODEL in a .env file.
@@ -16,19 +16,29 @@ import tempfile
 import pathlib
 import html
 import asyncio
+import functools
 import time
+import threading
 from dotenv import load_dotenv
 from tqdm import tqdm
+import orjson
 
 # PDF extraction
 import fitz  # PyMuPDF
 
 # solving
-from sympy import symbols, Eq, solve
+from sympy import symbols, Eq, expand, solve
+from sympy.parsing.sympy_parser import (
+    implicit_multiplication,
+    parse_expr,
+    standard_transformations,
+)
 import google.generativeai as genai
 
 # pdf rendering
-from playwright.async_api import async_playwright
+from browser_pool import get_browser, run_render, run_render_async
+
+from llm_cache import CACHE_ENABLED, CachedGemini
 
 # -------------------------
 # Load environment
@@ -46,6 +56,22 @@ if not API_KEY:
 
 genai.configure(api_key=API_KEY)
 model = genai.GenerativeModel(MODEL_NAME)
+# Solved items translated per Gemini request (answered as one JSON array).
+BATCH_SIZE = int(os.getenv("GENAI_BATCH_SIZE", "20"))
+# Upper bound on Gemini requests in flight across the whole process (stay under the API's rate limit).
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "32"))
+
+# -------------------------
+# Regex patterns (compiled once)
+# -------------------------
+JSON_BLOCK_REGEX = re.compile(r"```json\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+JSON_BLOCK_CASE_SENSITIVE_REGEX = re.compile(r"```json\s*(.*?)```", re.DOTALL)
+EQUATION_CLEAN_REGEX = re.compile(r"[^\dxX\+\-\*/=\.\(\)\s]")
+# Leading "12.", "Q1.", "Question 12:" labels; left in, implicit multiplication
+# would read the question number as a factor.
+EQUATION_LABEL_REGEX = re.compile(r"^\s*(?:Q(?:uestion)?\s*)?\d+[.:)]", re.IGNORECASE)
+SPACED_NUMBERS_REGEX = re.compile(r"\d\s+\d")
+WHITESPACE_REGEX = re.compile(r"\s+")
 
 # -------------------------
 # Helpers
@@ -53,17 +79,28 @@ model = genai.GenerativeModel(MODEL_NAME)
 def clean(s):
     if not s:
         return ""
-    s = html.unescape(str(s))
-    return s.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&").strip()
+    s = str(s)
+    if "&" not in s:
+        # No entities at all: nothing to unescape.
+        return s.strip()
+    s = html.unescape(s)
+    if "&" in s:
+        # Double-escaped input (e.g. "&amp;lt;") still has entities after one pass.
+        s = s.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+    return s.strip()
+
+def write_json(path, data):
+    """Pretty-printed UTF-8 JSON (same layout as json.dump(indent=2, ensure_ascii=False)), via orjson."""
+    pathlib.Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
 def extract_json_block(text: str) -> str:
-    match = re.search(r"```json\s*(.*?)```", text or "", re.DOTALL | re.IGNORECASE)
+    match = JSON_BLOCK_REGEX.search(text or "")
     return match.group(1).strip() if match else (text or "").strip()
 
 def extract_inner_json(text):
     if not text:
         return None
-    match = re.search(r"```json\s*(.*?)```", text, re.DOTALL)
+    match = JSON_BLOCK_CASE_SENSITIVE_REGEX.search(text)
     if match:
         inner = match.group(1)
         try:
@@ -72,64 +109,151 @@ def extract_inner_json(text):
             return None
     return None
 
+# -------------------------
+# Gemini response cache
+# -------------------------
+@functools.lru_cache(maxsize=1)
+def _response_cache():
+    return CachedGemini(MODEL_NAME)
+
+def cached_generate(prompt):
+    """model.generate_content(prompt).text, answered from the on-disk cache when seen before."""
+    if CACHE_ENABLED:
+        cached = _response_cache().get(prompt, "solution")
+        if cached is not None:
+            return cached
+    text = model.generate_content(prompt).text or ""
+    if CACHE_ENABLED:
+        _response_cache().put(prompt, text, "solution")
+    return text
+
+async def cached_generate_async(prompt):
+    """Async counterpart of cached_generate; SQLite access runs on a worker thread."""
+    if CACHE_ENABLED:
+        cached = await asyncio.to_thread(_response_cache().get, prompt, "solution")
+        if cached is not None:
+            return cached
+    response = await model.generate_content_async(prompt)
+    text = response.text or ""
+    if CACHE_ENABLED:
+        await asyncio.to_thread(_response_cache().put, prompt, text, "solution")
+    return text
+
+class _ProcessLimiter:
+    """
+    Async context manager capping work in flight across every run in the process.
+    Each pipeline run has its own event loop (asyncio.run on a worker thread), so
+    an asyncio.Semaphore cannot be shared; this polls a threading semaphore instead.
+    """
+
+    def __init__(self, limit):
+        self._slots = threading.BoundedSemaphore(limit)
+
+    async def __aenter__(self):
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(0.05)
+
+    async def __aexit__(self, *exc):
+        self._slots.release()
+
+GEMINI_LIMITER = _ProcessLimiter(GEMINI_CONCURRENCY)
+
 # -------------------------
 # Math solver helper (naive)
 # -------------------------
-def solve_math_equation(equation_text: str):
+EQUATION_TRANSFORMATIONS = standard_transformations + (implicit_multiplication,)
+
+@functools.lru_cache(maxsize=4096)
+def _solve_clean_equation(clean_text: str):
+    # Pure for a given normalized string, so repeated templated equations solve once.
     x = symbols('x')
     try:
-        # Keep only characters likely in simple equations (digits, x, ops, =, parentheses, decimal)
-        clean_text = re.sub(r"[^\dxX\+\-\*/=\.\(\)\s]", "", equation_text)
-        if "=" not in clean_text:
-            return None
         lhs, rhs = clean_text.split("=", 1)
-        # naive insertion of '*' for things like 2x -> 2*x
-        lhs = re.sub(r"(?<=\d)x", "*x", lhs)
-        rhs = re.sub(r"(?<=\d)x", "*x", rhs)
-        # attempt to evaluate both sides as Python expressions (works for simple numeric forms)
-        eq = Eq(eval(lhs), eval(rhs))
-        solution = solve(eq, x)
-        return solution
+        # SymPy parses both sides directly; implicit multiplication handles 2x -> 2*x
+        lhs_expr = parse_expr(lhs, transformations=EQUATION_TRANSFORMATIONS, local_dict={"x": x})
+        rhs_expr = parse_expr(rhs, transformations=EQUATION_TRANSFORMATIONS, local_dict={"x": x})
+        # Fast path for the common a*x + b = c*x + d shape: solve it directly
+        # instead of going through solve()'s general machinery.
+        residual = expand(lhs_expr - rhs_expr)
+        slope, intercept = residual.coeff(x, 1), residual.coeff(x, 0)
+        if slope != 0 and slope.is_number and intercept.is_number and residual == slope * x + intercept:
+            return (-intercept / slope,)
+        return tuple(solve(Eq(lhs_expr, rhs_expr), x))
     except Exception:
         return None
 
+def solve_math_equation(equation_text: str):
+    # Keep only characters likely in simple equations (digits, x, ops, =, parentheses, decimal)
+    equation_text = EQUATION_LABEL_REGEX.sub("", equation_text, count=1)
+    clean_text = WHITESPACE_REGEX.sub(" ", EQUATION_CLEAN_REGEX.sub("", equation_text)).strip()
+    # Numbers separated only by spaces (years, stray labels) are not a product: leave them to the LLM.
+    if "=" not in clean_text or SPACED_NUMBERS_REGEX.search(clean_text):
+        return None
+    solution = _solve_clean_equation(clean_text)
+    # Hand callers their own list; the cached tuple stays immutable.
+    return list(solution) if solution is not None else None
+
 # -------------------------
 # Extraction (no OCR)
 # -------------------------
-def extract_pdf(input_pdf, output_json="extracted_data.json", output_image_folder="extracted_images"):
-    os.makedirs(output_image_folder, exist_ok=True)
+# Formats whose embedded bytes are written as-is; anything else (JBIG2, JPX,
+# CCITT, ...) is decoded and saved as PNG so downstream viewers can open it.
+PASSTHROUGH_IMAGE_EXTS = {"png", "jpeg", "jpg"}
+
+def _save_image(doc, xref, img_base):
+    """Write image `xref` to `img_base`.<ext> and return the path."""
+    info = doc.extract_image(xref)
+    if info and info.get("ext") in PASSTHROUGH_IMAGE_EXTS:
+        # The stream's own compressed bytes: no decode / PNG re-encode round-trip.
+        img_path = f"{img_base}.{info['ext']}"
+        with open(img_path, "wb") as f:
+            f.write(info["image"])
+        return img_path
+
+    pix = fitz.Pixmap(doc, xref)
+    if pix.n > 4:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    img_path = f"{img_base}.png"
+    pix.save(img_path)
+    return img_path
+
+def _extract_pages(input_pdf, output_image_folder):
+    """Yield one extracted page dict at a time. PyMuPDF is single-threaded: keep each call on one thread."""
     try:
         doc = fitz.open(input_pdf)
     except Exception as e:
         raise RuntimeError(f"Failed to open PDF '{input_pdf}': {e}")
+    try:
+        for page_number in range(doc.page_count):
+            page = doc[page_number]
+            # Text blocks only (block_type 0); image blocks carry no usable text.
+            raw_blocks = [b[4] for b in page.get_text("blocks") if b[6] == 0]
+            text = "".join(raw_blocks)
+            blocks = [block.strip() for block in raw_blocks if block.strip()]
+            images = []
+            for img_index, img in enumerate(page.get_images(full=True)):
+                xref = img[0]
+                try:
+                    img_base = os.path.join(output_image_folder, f"page{page_number+1}_img{img_index+1}")
+                    images.append(_save_image(doc, xref, img_base))
+                except Exception as ie:
+                    print(f"⚠️ Failed to save image page{page_number+1}_img{img_index+1}: {ie}")
+                    continue
+
+            yield {
+                "page": page_number + 1,
+                "text": text.strip(),
+                "blocks": blocks,
+                "images": images
+            }
+    finally:
+        doc.close()
 
-    all_pages_data = []
-    for page_number, page in enumerate(doc):
-        text = page.get_text() or ""
-        images = []
-        for img_index, img in enumerate(page.get_images(full=True)):
-            xref = img[0]
-            try:
-                pix = fitz.Pixmap(doc, xref)
-                img_name = f"page{page_number+1}_img{img_index+1}.png"
-                img_path = os.path.join(output_image_folder, img_name)
-                if pix.n > 4:
-                    pix = fitz.Pixmap(fitz.csRGB, pix)
-                pix.save(img_path)
-                images.append(img_path)
-            except Exception as ie:
-                print(f"⚠️ Failed to save image page{page_number+1}_img{img_index+1}: {ie}")
-                continue
-
-        page_data = {
-            "page": page_number + 1,
-            "text": text.strip(),
-            "images": images
-        }
-        all_pages_data.append(page_data)
+def extract_pdf(input_pdf, output_json="extracted_data.json", output_image_folder="extracted_images"):
+    os.makedirs(output_image_folder, exist_ok=True)
+    all_pages_data = list(_extract_pages(input_pdf, output_image_folder))
 
-    with open(output_json, "w", encoding="utf-8") as f:
-        json.dump(all_pages_data, f, ensure_ascii=False, indent=2)
+    write_json(output_json, all_pages_data)
 
     print(f"✅ Extraction complete. Saved to '{output_json}'")
     return all_pages_data
@@ -157,7 +281,7 @@ def split_questions(text: str):
     current_lines = []
     current_number = None
 
-    lines = [re.sub(r"\s+", " ", line).strip() for line in text.splitlines()]
+    lines = [WHITESPACE_REGEX.sub(" ", line).strip() for line in text.splitlines()]
     for line in lines:
         if not line:
             continue
@@ -192,98 +316,154 @@ def split_questions(text: str):
     return units
 
 
-def solve_units(question_units):
-    results = []
-    for unit in question_units:
-        text = unit.get("text", "").strip() if isinstance(unit, dict) else str(unit).strip()
-        if not text:
-            continue
-
-        sympy_solution = solve_math_equation(text)
-        if sympy_solution:
-            prompt = f"""
+SOLVE_PROMPT_SYMPY = """
 You are a math teacher. Explain in 2 lines how to solve this:
 Equation: {text}
-Answer: {sympy_solution}
+Answer: {solution}
 Return only 2-line explanation text.
 """
-            try:
-                response = model.generate_content(prompt)
-                explanation = (response.text or "").strip()
-            except Exception as e:
-                explanation = f"Error generating explanation: {e}"
-
-            entry = {
-                "question_text": text,
-                "answer": str(sympy_solution),
-                "explanation": explanation,
-                "method": "sympy"
-            }
-            if isinstance(unit, dict) and unit.get("number"):
-                entry["question_number"] = unit["number"]
-            results.append(entry)
-            continue
 
-        prompt = f"""
+SOLVE_PROMPT_GEMINI = """
 You are an expert exam solver. Extract and solve all questions and MCQs present in the text below.
 For each question:
 - Include "question_number" if visible
 - Include "question_text" (copy the actual question)
 - Include "answer" (correct option number or text)
 - Include "explanation" (2-line reasoning)
-Return strictly as a JSON array, no markdown or commentary.
+{translate_fields}Return strictly as a JSON array, no markdown or commentary.
 
 TEXT:
 {text}
 """
-        try:
-            response = model.generate_content(prompt)
-            raw_output = extract_json_block(response.text)
-            parsed = None
-            try:
-                parsed = json.loads(raw_output)
-                if isinstance(parsed, dict):
-                    parsed = [parsed]
-            except Exception:
-                # if JSON parsing fails, keep raw_output
-                parsed = [{"question_text": text, "raw_output": raw_output}]
-            if isinstance(parsed, list):
-                for item in parsed:
-                    if isinstance(unit, dict) and unit.get("number"):
-                        item.setdefault("question_number", unit["number"])
-                results.extend(parsed)
-            else:
-                results.append(parsed)
-        except Exception as e:
-            entry = {
-                "question_text": text,
-                "error": str(e),
-                "method": "gemini_fallback"
-            }
-            if isinstance(unit, dict) and unit.get("number"):
-                entry["question_number"] = unit["number"]
-            results.append(entry)
 
-    return results
+SOLVE_TRANSLATE_FIELDS = """- Include "question_text_{lang_lower}", "answer_{lang_lower}" and "explanation_{lang_lower}":
+  the same question, answer and explanation translated into {target_lang}
+  (keep all numbers, symbols, and math expressions unchanged)
+"""
 
+def page_units(page):
+    """
+    Question units for one extracted page. Numbered questions are split across
+    the page's text blocks (options may sit in their own block); a page with no
+    numbered questions yields one unit per block instead of one for the page.
+    """
+    blocks = page.get("blocks")
+    if blocks is None:
+        text = str(page.get("text", "")).strip()
+        return split_questions(text) if text else []
+    if not blocks:
+        return []
+    units = split_questions("\n".join(blocks))
+    if len(blocks) > 1 and len(units) == 1 and units[0]["number"] is None:
+        return [{"number": None, "text": block} for block in blocks]
+    return units
 
-def solve_pages(pages):
+def _prepare_unit(unit, target_lang=None):
+    """
+    Return (text, sympy_solution, prompt) for a question unit, or None when it is empty.
+    With `target_lang`, LLM-solved units are asked for the translation in the same request.
+    """
+    text = unit.get("text", "").strip() if isinstance(unit, dict) else str(unit).strip()
+    if not text:
+        return None
+    sympy_solution = solve_math_equation(text)
+    if sympy_solution:
+        return text, sympy_solution, SOLVE_PROMPT_SYMPY.format(text=text, solution=sympy_solution)
+    translate_fields = ""
+    if target_lang:
+        translate_fields = SOLVE_TRANSLATE_FIELDS.format(target_lang=target_lang, lang_lower=target_lang.lower())
+    return text, None, SOLVE_PROMPT_GEMINI.format(text=text, translate_fields=translate_fields)
+
+def _unit_results(unit, text, sympy_solution, response_text=None, error=None):
+    """Turn one unit's Gemini response (or error) into solved entries."""
+    number = unit.get("number") if isinstance(unit, dict) else None
+    if sympy_solution:
+        entry = {
+            "question_text": text,
+            "answer": str(sympy_solution),
+            "explanation": (response_text or "").strip() if error is None else f"Error generating explanation: {error}",
+            "method": "sympy"
+        }
+        if number:
+            entry["question_number"] = number
+        return [entry]
+
+    if error is not None:
+        entry = {
+            "question_text": text,
+            "error": str(error),
+            "method": "gemini_fallback"
+        }
+        if number:
+            entry["question_number"] = number
+        return [entry]
+
+    raw_output = extract_json_block(response_text)
+    try:
+        parsed = json.loads(raw_output)
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+    except Exception:
+        # if JSON parsing fails, keep raw_output
+        parsed = [{"question_text": text, "raw_output": raw_output}]
+    if not isinstance(parsed, list):
+        return [parsed]
+    for item in parsed:
+        if number:
+            item.setdefault("question_number", number)
+    return parsed
+
+def solve_units(question_units):
     results = []
-    for page in tqdm(pages, desc="Solving pages"):
-        text = str(page.get("text", "")).strip()
-        if not text:
+    for unit in question_units:
+        prepared = _prepare_unit(unit)
+        if not prepared:
             continue
-        question_units = split_questions(text)
-        solved = solve_units(question_units)
-        results.extend(solved)
+        text, sympy_solution, prompt = prepared
+        try:
+            results.extend(_unit_results(unit, text, sympy_solution, cached_generate(prompt)))
+        except Exception as e:
+            results.extend(_unit_results(unit, text, sympy_solution, error=e))
+    return results
 
+async def _solve_unit_async(unit, prepared, progress):
+    text, sympy_solution, prompt = prepared
+    async with GEMINI_LIMITER:
+        try:
+            entries = _unit_results(unit, text, sympy_solution, await cached_generate_async(prompt))
+        except Exception as e:
+            entries = _unit_results(unit, text, sympy_solution, error=e)
+    progress.update(1)
+    return entries
+
+def _save_solved(results):
     os.makedirs("outputs", exist_ok=True)
     solved_path = os.path.join("outputs", "solved_extracted_data.json")
-    with open(solved_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    write_json(solved_path, results)
     print(f"✅ Solving complete. Saved to '{solved_path}'")
+
+async def solve_pages_async(pages, target_lang=None):
+    """
+    Solve every question unit on every page concurrently, keeping page/question order.
+    See _prepare_unit for `target_lang`.
+    """
+    jobs = []
+    for page in pages:
+        for unit in page_units(page):
+            prepared = _prepare_unit(unit, target_lang)
+            if prepared:
+                jobs.append((unit, prepared))
+
+    with tqdm(total=len(jobs), desc="Solving questions") as progress:
+        solved = await asyncio.gather(*[_solve_unit_async(unit, prepared, progress) for unit, prepared in jobs])
+
+    results = [entry for entries in solved for entry in entries]
+    _save_solved(results)
     return results
 
+def solve_pages(pages):
+    return asyncio.run(solve_pages_async(pages))
+
 # -------------------------
 # Translation
 # -------------------------
@@ -299,63 +479,277 @@ LANGUAGES = {
     "9": "English"
 }
 
-def translate_items(items, target_lang):
+def _translation_prompt(batch, target_lang):
+    lang_lower = target_lang.lower()
+    items = "\n".join(
+        f"""
+ITEM {i}
+Question: {item.get("question_text", "")}
+Answer: {item.get("answer", "")}
+Explanation: {item.get("explanation", "")}"""
+        for i, item in enumerate(batch)
+    )
+    return f"""
+Translate the following {len(batch)} solved MCQ(s) into {target_lang}.
+Keep all numbers, symbols, and math expressions unchanged.
+
+Return output strictly as a JSON array with one object per item, like:
+[
+  {{
+    "idx": <ITEM number>,
+    "question_text_{lang_lower}": "...",
+    "answer_{lang_lower}": "...",
+    "explanation_{lang_lower}": "..."
+  }}
+]
+{items}
+"""
+
+def _parse_translation_batch(raw, count):
+    """Map ITEM index -> translated fields from a batch response; unparseable entries are skipped."""
+    try:
+        parsed = json.loads(extract_json_block(raw))
+    except Exception:
+        return {}
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    answers = {}
+    for obj in parsed if isinstance(parsed, list) else []:
+        if not isinstance(obj, dict):
+            continue
+        try:
+            idx = int(obj.pop("idx"))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= idx < count:
+            answers[idx] = obj
+    return answers
+
+async def _translate_batch(batch, start, target_lang):
+    first_qid = batch[0].get("question_number", start + 1)
+    print(f"[Translation] Processing {len(batch)} question(s) from {first_qid} → {target_lang}")
+    try:
+        async with GEMINI_LIMITER:
+            raw = await cached_generate_async(_translation_prompt(batch, target_lang))
+        answers = _parse_translation_batch(raw, len(batch))
+        batch_error = None
+    except Exception as err:
+        raw, answers = "", {}
+        batch_error = err
+
     lang_lower = target_lang.lower()
     translated = []
-    for idx, item in enumerate(items, start=1):
+    for offset, item in enumerate(batch):
         q = item.get("question_text", "")
         a = item.get("answer", "")
         e = item.get("explanation", "")
-        qid = item.get("question_number", idx)
-        print(f"[Translation] Processing question {qid} → {target_lang}")
+        qid = item.get("question_number", start + offset + 1)
+        fallback = {
+            **item,
+            f"question_text_{lang_lower}": q,
+            f"answer_{lang_lower}": a,
+            f"explanation_{lang_lower}": e,
+        }
+        if batch_error is not None:
+            fallback[f"translation_error_{lang_lower}"] = str(batch_error)
+            translated.append(fallback)
+            print(f"  ❌ translation failed for question {qid}: {batch_error}")
+            continue
 
-        prompt = f"""
-Translate the following solved MCQ into {target_lang}.
-Keep all numbers, symbols, and math expressions unchanged.
+        parsed = answers.get(offset)
+        if parsed:
+            translated.append({**item, **parsed})
+            print(f"  ✓ translated question {qid}")
+        else:
+            fallback[f"raw_translation_{lang_lower}"] = raw
+            translated.append(fallback)
+            print(f"  ⚠ using fallback text for question {qid} (missing from JSON response)")
+    return translated
 
-Return output strictly as JSON like:
-{{
-  "question_text_{lang_lower}": "...",
-  "answer_{lang_lower}": "...",
-  "explanation_{lang_lower}": "..."
-}}
+async def translate_items_async(items, target_lang):
+    """Translate in BATCH_SIZE-item requests, all in flight at once (bounded by GEMINI_LIMITER)."""
+    batches = await asyncio.gather(*[
+        _translate_batch(items[start:start + BATCH_SIZE], start, target_lang)
+        for start in range(0, len(items), BATCH_SIZE)
+    ])
+    translated = [entry for batch in batches for entry in batch]
+    _save_translated(translated, target_lang)
+    return translated
 
-Question: {q}
-Answer: {a}
-Explanation: {e}
-"""
-        try:
-            response = model.generate_content(prompt)
-            parsed = extract_inner_json(response.text.strip())
-            if parsed:
-                merged = {**item, **parsed}
-                print(f"  ✓ translated question {qid}")
-            else:
-                merged = {
-                    **item,
-                    f"question_text_{lang_lower}": q or item.get("question_text", ""),
-                    f"answer_{lang_lower}": a or item.get("answer", ""),
-                    f"explanation_{lang_lower}": e or item.get("explanation", ""),
-                    f"raw_translation_{lang_lower}": response.text.strip()
-                }
-                print(f"  ⚠ using fallback text for question {qid} (JSON parse failed)")
-            translated.append(merged)
-        except Exception as err:
-            fallback = {
-                **item,
-                f"question_text_{lang_lower}": q or item.get("question_text", ""),
-                f"answer_{lang_lower}": a or item.get("answer", ""),
-                f"explanation_{lang_lower}": e or item.get("explanation", ""),
-            }
-            fallback[f"translation_error_{lang_lower}"] = str(err)
-            translated.append(fallback)
-            print(f"  ❌ translation failed for question {qid}: {err}")
+def translate_items(items, target_lang):
+    return asyncio.run(translate_items_async(items, target_lang))
 
-    out_file = os.path.join("outputs", f"translated_{lang_lower}_auto.json")
-    with open(out_file, "w", encoding="utf-8") as f:
-        json.dump(translated, f, ensure_ascii=False, indent=2)
+def _save_translated(translated, target_lang):
+    out_file = os.path.join("outputs", f"translated_{target_lang.lower()}_auto.json")
+    write_json(out_file, translated)
     print(f"✅ Translation complete. Saved to '{out_file}'")
-    return translated
+
+# -------------------------
+# Streaming pipeline (extract -> solve -> translate)
+# -------------------------
+# Pages/items buffered between two stages; a full queue pauses the stage upstream.
+PIPELINE_QUEUE_SIZE = 64
+_END = object()
+
+async def extract_stream(input_pdf, output_image_folder="extracted_images"):
+    """
+    Yield extracted pages in order while one worker thread reads the rest.
+    All MuPDF work stays on that thread; it pauses once PIPELINE_QUEUE_SIZE
+    pages are waiting to be consumed.
+    """
+    os.makedirs(output_image_folder, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Queue()
+    slots = threading.Semaphore(PIPELINE_QUEUE_SIZE)
+    stop = threading.Event()
+
+    def send(item):
+        loop.call_soon_threadsafe(ready.put_nowait, item)
+
+    def produce():
+        try:
+            for page_data in _extract_pages(input_pdf, output_image_folder):
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                send(page_data)
+            send(_END)
+        except Exception as e:
+            if not stop.is_set():
+                send(e)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while (item := await ready.get()) is not _END:
+            if isinstance(item, Exception):
+                raise item
+            slots.release()
+            yield item
+    finally:
+        stop.set()
+        await asyncio.shield(producer)
+
+async def _feed_pages(pages, pages_q, sink=None):
+    try:
+        async for page_data in pages:
+            if sink is not None:
+                sink.append(page_data)
+            await pages_q.put(page_data)
+    finally:
+        await pages_q.put(_END)
+
+async def solve_stream(pages_q, out_q, target_lang=None):
+    """Solve units from pages_q as they arrive; solved items reach out_q in page/question order."""
+    # Holds the in-flight solve tasks in order; its bound caps how far solving runs ahead.
+    pending_q = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    progress = tqdm(desc="Solving questions")
+
+    async def schedule():
+        try:
+            while (page := await pages_q.get()) is not _END:
+                for unit in page_units(page):
+                    prepared = _prepare_unit(unit, target_lang)
+                    if prepared:
+                        await pending_q.put(asyncio.create_task(_solve_unit_async(unit, prepared, progress)))
+        finally:
+            await pending_q.put(_END)
+
+    async def drain():
+        try:
+            while (task := await pending_q.get()) is not _END:
+                for entry in await task:
+                    await out_q.put(entry)
+        finally:
+            await out_q.put(_END)
+
+    try:
+        await asyncio.gather(schedule(), drain())
+    finally:
+        progress.close()
+
+async def translate_stream(solved_q, out_q, target_lang, solved_sink=None):
+    """
+    Translate solved items from solved_q in BATCH_SIZE-item requests, passing
+    through items already translated while solving; order is preserved.
+    """
+    loop = asyncio.get_running_loop()
+    key = f"question_text_{target_lang.lower()}"
+    # One future per item, in arrival order. Unbounded: a future can wait on a
+    # batch that only fills after later items are read.
+    results_q = asyncio.Queue()
+    batch, batches = [], set()
+
+    async def run_batch(items, start):
+        entries = await _translate_batch([item for item, _ in items], start, target_lang)
+        for (_, future), entry in zip(items, entries):
+            future.set_result(entry)
+
+    def flush(start):
+        if batch:
+            task = asyncio.create_task(run_batch(list(batch), start - len(batch)))
+            batches.add(task)
+            task.add_done_callback(batches.discard)
+            batch.clear()
+
+    async def schedule():
+        seen = 0
+        try:
+            while (item := await solved_q.get()) is not _END:
+                if solved_sink is not None:
+                    solved_sink.append(item)
+                future = loop.create_future()
+                if isinstance(item, dict) and item.get(key):
+                    future.set_result(item)
+                else:
+                    batch.append((item, future))
+                seen += 1
+                if len(batch) >= BATCH_SIZE:
+                    flush(seen)
+                results_q.put_nowait(future)
+            flush(seen)
+        finally:
+            results_q.put_nowait(_END)
+
+    async def drain():
+        try:
+            while (future := await results_q.get()) is not _END:
+                await out_q.put(await future)
+        finally:
+            await out_q.put(_END)
+
+    await asyncio.gather(schedule(), drain())
+
+async def run_solution_stream(input_pdf, target_lang, output_image_folder="extracted_images",
+                              extracted_json=None, solved_json=None, translated_json=None):
+    """
+    Extract, solve and translate as one streaming pipeline: each stage consumes
+    the previous one's queue while it is still being filled. JSON snapshots are
+    written only for the paths given. Returns (solved, translated).
+    """
+    pages_q = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    solved_q = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    translated_q = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    pages = [] if extracted_json else None
+    solved, translated = [], []
+
+    async def collect():
+        while (item := await translated_q.get()) is not _END:
+            translated.append(item)
+
+    await asyncio.gather(
+        _feed_pages(extract_stream(input_pdf, output_image_folder), pages_q, pages),
+        solve_stream(pages_q, solved_q, target_lang),
+        translate_stream(solved_q, translated_q, target_lang, solved),
+        collect(),
+    )
+
+    for path, data in ((extracted_json, pages), (solved_json, solved), (translated_json, translated)):
+        if path:
+            write_json(path, data)
+    print(f"✅ Solved and translated {len(translated)} question(s) → {target_lang}")
+    return solved, translated
 
 # -------------------------
 # JSON -> PDF (Playwright rendering)
@@ -368,24 +762,33 @@ FONTS = {
     "kannada":"NotoSansKannada-VariableFont.ttf",
 }
 
+# Checked in order; translated items carry keys like "question_text_telugu".
+LANGUAGE_KEY_MARKERS = (
+    ("telugu", ("telugu",)),
+    ("hindi", ("hindi",)),
+    ("odia", ("odia", "oriya")),
+    ("tamil", ("tamil",)),
+    ("kannada", ("kannada",)),
+)
+
 def detect_language_sample(data):
-    if not data:
-        return "telugu"
-    sample = json.dumps(data[:5], ensure_ascii=False).lower()
-    if "telugu" in sample:
-        return "telugu"
-    elif "hindi" in sample:
-        return "hindi"
-    elif "odia" in sample or "oriya" in sample:
-        return "odia"
-    elif "tamil" in sample:
-        return "tamil"
-    elif "kannada" in sample:
-        return "kannada"
-    else:
-        return "telugu"
+    keys = " ".join(str(key).lower() for item in (data or [])[:5] if isinstance(item, dict) for key in item)
+    for lang, markers in LANGUAGE_KEY_MARKERS:
+        if any(marker in keys for marker in markers):
+            return lang
+    return "telugu"
+
+_LANG_LABELS = {
+    "telugu": ("సమాధానం", "వివరణ", "తెలుగులో అనువదించిన ప్రశ్నపత్రం"),
+    "hindi":  ("उत्तर", "व्याख्या", "हिंदी में अनुवादित प्रश्नपत्र"),
+    "odia":   ("ଉତ୍ତର", "ବ୍ୟାଖ୍ୟା", "ଓଡ଼ିଆରେ ଅନୁବାଦିତ ପ୍ରଶ୍ନପତ୍ର"),
+    "tamil":  ("பதில்", "விரிவுரை", "தமிழில் மொழிபெயர்த்த கேள்வித்தாள்"),
+    "kannada":("ಉತ್ತರ", "ವಿವರಣೆ", "ಕನ್ನಡದಲ್ಲಿ ಅನುವಾದಿತ ಪ್ರಶ್ನೆ ಪತ್ರಿಕೆ")
+}
 
-def build_html(pages, lang):
+@functools.lru_cache(maxsize=16)
+def _font_css(lang):
+    """Return (@font-face rule, body font-family) for `lang`; the font file is resolved once."""
     font_file = FONTS.get(lang, None)
     if font_file and os.path.exists(font_file):
         font_path = pathlib.Path(font_file).resolve().as_uri()
@@ -397,20 +800,14 @@ def build_html(pages, lang):
             font-style: normal;
         }}
         """
-        body_font = "LangFont, sans-serif"
-    else:
-        font_face = ""
-        body_font = "sans-serif"
-
-    lang_labels = {
-        "telugu": ("సమాధానం", "వివరణ", "తెలుగులో అనువదించిన ప్రశ్నపత్రం"),
-        "hindi":  ("उत्तर", "व्याख्या", "हिंदी में अनुवादित प्रश्नपत्र"),
-        "odia":   ("ଉତ୍ତର", "ବ୍ୟାଖ୍ୟା", "ଓଡ଼ିଆରେ ଅନୁବାଦିତ ପ୍ରଶ୍ନପତ୍ର"),
-        "tamil":  ("பதில்", "விரிவுரை", "தமிழில் மொழிபெயர்த்த கேள்வித்தாள்"),
-        "kannada":("ಉತ್ತರ", "ವಿವರಣೆ", "ಕನ್ನಡದಲ್ಲಿ ಅನುವಾದಿತ ಪ್ರಶ್ನೆ ಪತ್ರಿಕೆ")
-    }
-    ans_label, exp_label, title_label = lang_labels.get(lang, lang_labels["telugu"])
-
+        return font_face, "LangFont, sans-serif"
+    return "", "sans-serif"
+
+@functools.lru_cache(maxsize=16)
+def _html_head(lang):
+    """Document head, stylesheet and title for `lang`, up to the first question."""
+    font_face, body_font = _font_css(lang)
+    title_label = _LANG_LABELS.get(lang, _LANG_LABELS["telugu"])[2]
     css = f"""
     {font_face}
     html, body {{
@@ -425,54 +822,95 @@ def build_html(pages, lang):
     p {{ margin: 0 0 6pt 0; white-space: pre-wrap; }}
     .question {{ margin-bottom: 18pt; border-bottom:1px solid #ccc; padding-bottom:8pt; }}
     """
+    return "\n".join(["<!doctype html><html><head><meta charset='utf-8'>",
+                      "<meta name='viewport' content='width=device-width, initial-scale=1'>",
+                      f"<style>{css}</style></head><body>",
+                      f"<h1>{title_label}</h1>"])
 
-    parts = ["<!doctype html><html><head><meta charset='utf-8'>",
-             "<meta name='viewport' content='width=device-width, initial-scale=1'>",
-             f"<style>{css}</style></head><body>",
-             f"<h1>{title_label}</h1>"]
+def build_html(pages, lang):
+    ans_label, exp_label, _ = _LANG_LABELS.get(lang, _LANG_LABELS["telugu"])
+    parts = [_html_head(lang)]
 
-    suffix = f"_{lang}"
+    question_key = f"question_text_{lang}"
+    answer_key = f"answer_{lang}"
+    explanation_key = f"explanation_{lang}"
     for i, item in enumerate(pages, start=1):
-        q_no = clean(item.get("question_number", str(i)))
-        q_text = clean(item.get(f"question_text{suffix}", "")) or clean(item.get("question_text", ""))
-        ans = clean(item.get(f"answer{suffix}", "")) or clean(item.get("answer", ""))
-        exp = clean(item.get(f"explanation{suffix}", "")) or clean(item.get("explanation", ""))
+        q_text = clean(item.get(question_key)) or clean(item.get("question_text"))
+        ans = clean(item.get(answer_key)) or clean(item.get("answer"))
+        exp = clean(item.get(explanation_key)) or clean(item.get("explanation"))
 
         if not (q_text or ans or exp):
             continue
 
-        parts.append("<div class='question'>")
-        parts.append(f"<h2>Q{q_no}.</h2>")
+        q_no = clean(item.get("question_number", str(i)))
+        block = f"<div class='question'>\n<h2>Q{q_no}.</h2>"
         if q_text:
-            parts.append(f"<p>{q_text}</p>")
+            block += f"\n<p>{q_text}</p>"
         if ans:
-            parts.append(f"<p><b>{ans_label}:</b> {ans}</p>")
+            block += f"\n<p><b>{ans_label}:</b> {ans}</p>"
         if exp:
-            parts.append(f"<p><b>{exp_label}:</b> {exp}</p>")
-        parts.append("</div>")
+            block += f"\n<p><b>{exp_label}:</b> {exp}</p>"
+        parts.append(block + "\n</div>")
 
     parts.append("</body></html>")
     return "\n".join(parts)
 
-async def render_pdf_from_data(data, lang, output_pdf):
-    html_doc = build_html(data, lang)
+PDF_MARGIN = {"top": "1cm", "right": "1cm", "bottom": "1cm", "left": "1cm"}
+PDF_PAGE_CSS = "@page { size: A4; margin: 1cm; }"
+
+def _write_pdf_weasyprint(html_doc, output_pdf):
+    """
+    Render with WeasyPrint when it is installed: no browser process for these
+    static, script-free documents. Returns False so callers can fall back.
+    """
+    try:
+        from weasyprint import CSS, HTML
+    except (ImportError, OSError):
+        # OSError: the Python package is present but Pango/Cairo are not.
+        return False
+    HTML(string=html_doc, base_url=os.getcwd()).write_pdf(output_pdf, stylesheets=[CSS(string=PDF_PAGE_CSS)])
+    return True
+
+async def _write_pdf_playwright(html_doc, output_pdf):
+    # Runs on the shared render loop: Chromium is launched once and reused.
     tmpdir = tempfile.mkdtemp()
     html_path = os.path.join(tmpdir, "doc.html")
     with open(html_path, "w", encoding="utf-8") as f:
         f.write(html_doc)
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
+    browser = await get_browser()
+    page = await browser.new_page()
+    try:
         await page.goto(pathlib.Path(html_path).resolve().as_uri())
-        await page.pdf(path=output_pdf, format="A4", margin={"top":"1cm","right":"1cm","bottom":"1cm","left":"1cm"}, print_background=True)
-        await browser.close()
+        await page.pdf(path=output_pdf, format="A4", margin=PDF_MARGIN, print_background=True)
+    finally:
+        await page.close()
 
+async def render_pdf_from_data(data, lang, output_pdf):
+    html_doc = build_html(data, lang)
+    if not await asyncio.to_thread(_write_pdf_weasyprint, html_doc, output_pdf):
+        await run_render_async(_write_pdf_playwright(html_doc, output_pdf))
     print(f"✅ PDF rendered → {output_pdf}")
 
 # -------------------------
 # Main CLI flow
 # -------------------------
+async def _solve_translate_render(input_pdf, target_lang, output_pdf):
+    print(f"\n🔍 Extracting, solving and translating → {target_lang} ...")
+    os.makedirs("outputs", exist_ok=True)
+    solved, translated = await run_solution_stream(
+        input_pdf,
+        target_lang,
+        output_image_folder="extracted_images",
+        extracted_json="extracted_data.json",
+        solved_json=os.path.join("outputs", "solved_extracted_data.json"),
+        translated_json=os.path.join("outputs", f"translated_{target_lang.lower()}_auto.json"),
+    )
+
+    print("\n📄 Rendering final PDF ...")
+    await render_pdf_from_data(translated, target_lang.lower(), output_pdf)
+    return solved, translated
+
 def main():
     print("\n--- Unified pipeline (NO OCR) ---\n")
     input_pdf = input("Enter path to input PDF (or drag & drop): ").strip()
@@ -487,22 +925,9 @@ def main():
     target_lang = LANGUAGES.get(choice, "Telugu")
     lang_lower = target_lang.lower()
 
-    # 1) Extract
-    print("\n🔍 Extracting PDF (text + images) ...")
-    pages = extract_pdf(input_pdf, output_json="extracted_data.json", output_image_folder="extracted_images")
-
-    # 2) Solve
-    print("\n🧠 Solving extracted content ...")
-    solved = solve_pages(pages)
-
-    # 3) Translate
-    print(f"\n🌐 Translating solved content → {target_lang} ...")
-    translated = translate_items(solved, target_lang)
-
-    # 4) Render PDF
-    print("\n📄 Rendering final PDF ...")
+    # 1-4) Extract, solve and translate as one stream, then render, on one event loop
     output_pdf_name = f"final_output_{lang_lower}.pdf"
-    asyncio.run(render_pdf_from_data(translated, lang_lower, output_pdf_name))
+    asyncio.run(_solve_translate_render(input_pdf, target_lang, output_pdf_name))
 
     print("\n🎉 All done! Check the 'outputs' folder for intermediate JSON files and the final PDF.")
     print("If you want images embedded in the PDF later, tell me and I will add that feature.\n")
@@ -534,20 +959,8 @@ def render_pdf_from_solutions(items, lang, output_pdf):
     html_sections.append("</body></html>")
 
     html_doc = "\n".join(html_sections)
-    tmpdir = tempfile.mkdtemp()
-    html_path = os.path.join(tmpdir, "solutions.html")
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(html_doc)
-
-    async def _render():
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-            await page.goto(pathlib.Path(html_path).resolve().as_uri())
-            await page.pdf(path=output_pdf, format="A4", margin={"top":"1cm","right":"1cm","bottom":"1cm","left":"1cm"}, print_background=True)
-            await browser.close()
-
-    asyncio.run(_render())
+    if not _write_pdf_weasyprint(html_doc, output_pdf):
+        run_render(_write_pdf_playwright(html_doc, output_pdf))
 
 
 def run_solution_pipeline(pdf_path: str,
@@ -559,14 +972,12 @@ def run_solution_pipeline(pdf_path: str,
     extracted_json_path = os.path.join(output_dir, f"extracted_{timestamp}.json")
     extracted_images_dir = os.path.join(output_dir, f"extracted_images_{timestamp}")
 
-    pages = extract_pdf(
+    solved_items, translated_items = asyncio.run(run_solution_stream(
         pdf_path,
-        output_json=extracted_json_path,
-        output_image_folder=extracted_images_dir
-    )
-
-    solved_items = solve_pages(pages)
-    translated_items = translate_items(solved_items, target_language)
+        target_language,
+        output_image_folder=extracted_images_dir,
+        extracted_json=extracted_json_path,
+    ))
 
     lang_lower = target_language.lower()
     output_pdf = os.path.join(output_dir, f"solutions_{lang_lower}_{timestamp}.pdf")
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+pytest.importorskip("fitz")
+pytest.importorskip("sympy")
+pytest.importorskip("google.generativeai")
+
+# solution.py exits at import without a key; no request is made in these tests.
+os.environ.setdefault("GENAI_API_KEY", "test-key")
+
+from solution import solve_math_equation  # noqa: E402
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12. 3x = 9", 3),
+    ("Question 12: 3x = 9", 3),
+    ("15. Solve 5x = 25", 5),
+    ("Q1. 4x - 8 = 0", 2),
+    ("2x + 3 = 7", 2),
+])
+def test_question_label_is_not_a_factor(text, expected):
+    assert solve_math_equation(text) == [expected]
+
+
+@pytest.mark.parametrize("text", [
+    "In 2019, 3x = 9",
+    "12 3x = 9",
+])
+def test_spaced_numbers_fall_back_to_llm(text):
+    assert solve_math_equation(text) is None
@@ -7,13 +7,17 @@
 import argparse
 import base64
 import copy
+import hashlib
 import html
 import io
 import json
 import math
 import os
+import queue
 import re
+import shutil
 import tempfile
+import threading
 import time
 from datetime import datetime
 from io import BytesIO
@@ -153,6 +157,14 @@ def merge_fragmented_text_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str,
     
     merged_blocks = []
     current_block = None
+    current_parts = []
+    
+    def flush_current():
+        # Join collected fragments once instead of growing the string per character
+        if len(current_parts) > 1:
+            current_block['content'] = "".join(current_parts)
+            current_block['word_count'] = len(current_block['content'].split())
+        merged_blocks.append(current_block)
     
     for block in blocks:
         content = block.get('content', '').strip()
@@ -169,24 +181,24 @@ def merge_fragmented_text_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str,
         if is_fragment:
             if current_block:
                 # Merge with current block
-                current_block['content'] += content
+                current_parts.append(content)
                 # Update position to include the merged character
                 current_block['position']['x1'] = block['position']['x1']
                 current_block['position']['width'] = current_block['position']['x1'] - current_block['position']['x0']
-                current_block['word_count'] = len(current_block['content'].split())
             else:
                 # Start new merged block
                 current_block = block.copy()
+                current_parts = [current_block.get('content', '')]
         else:
             # Non-fragment block
             if current_block:
-                merged_blocks.append(current_block)
+                flush_current()
                 current_block = None
             merged_blocks.append(block)
     
     # Don't forget the last merged block
     if current_block:
-        merged_blocks.append(current_block)
+        flush_current()
     
     return merged_blocks
 
@@ -385,11 +397,11 @@ class EnhancedBarChartDetector:
     def _analyze_surrounding_context(self, text_blocks):
         """Analyze surrounding text for chart indicators"""
         context_score = 0
-        relevant_text = ""
+        relevant_parts = []
         
         for block in text_blocks:
             content = block.get('content', '').lower()
-            relevant_text += " " + content
+            relevant_parts.append(content)
             
             # Direct chart mentions
             if any(keyword in content for keyword in self.chart_keywords):
@@ -404,6 +416,7 @@ class EnhancedBarChartDetector:
                 context_score += 0.1
         
         # Check for exam acronyms in context
+        relevant_text = " " + " ".join(relevant_parts)
         if any(acronym in relevant_text for acronym in ['mts', 'cgl', 'chsl']):
             context_score += 0.2
         
@@ -2557,7 +2570,7 @@ class PDFGenerator:
 
     def generate_pdf_fallback(self):
         pages = self.data.get("pages", [])
-        pdf = canvas.Canvas(self.output_pdf, pagesize=(595, 842))
+        pdf = canvas.Canvas(self.output_pdf, pagesize=(595, 842), pageCompression=1)
         for idx, pd in enumerate(pages):
             if idx > 0:
                 pdf.showPage()
@@ -2689,7 +2702,7 @@ class OverlayPDFGenerator:
             w = float(dims.get("width", 595) or 595)
             h = float(dims.get("height", 842) or 842)
             packet = io.BytesIO()
-            c = canvas.Canvas(packet, pagesize=(w, h))
+            c = canvas.Canvas(packet, pagesize=(w, h), pageCompression=1)
             blocks_drawn = 0
             
             for block in page_data.get("text_content", []):
@@ -2811,6 +2824,38 @@ def list_supported_languages():
         print(f"  - {code}: {name}")
 
 
+RENDER_QUEUE_SIZE = 2
+
+# Post-processed extraction JSON keyed by (PDF SHA-256, include_images, image_handling),
+# so switching the target language re-runs only the translation + rebuild stages.
+# Values are (JSON path, JSON SHA-256): the path can be overwritten by a later run
+# for another PDF, so a hit is only reused while the file still hashes the same.
+_EXTRACTION_CACHE: Dict[tuple, tuple] = {}
+# One lock per cache key, so concurrent runs on the same PDF extract it once.
+_EXTRACTION_LOCKS: Dict[tuple, threading.Lock] = {}
+_EXTRACTION_LOCKS_GUARD = threading.Lock()
+
+
+def _extraction_lock(cache_key: tuple) -> threading.Lock:
+    with _EXTRACTION_LOCKS_GUARD:
+        return _EXTRACTION_LOCKS.setdefault(cache_key, threading.Lock())
+
+
+def _temp_sibling(path: Path) -> Path:
+    """A fresh temp file next to `path`, for writing then os.replace-ing into place."""
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=path.suffix)
+    os.close(fd)
+    return Path(temp_name)
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def run_full_pipeline(pdf_path: str,
                       languages: List[str],
                       include_images: bool = True,
@@ -2833,38 +2878,50 @@ def run_full_pipeline(pdf_path: str,
     extracted_path = Path(extracted_json_path) if extracted_json_path else output_dir_path / f"{pdf_file.stem}_extracted.json"
     
     print("\n=== STEP 1: PDF → JSON Extraction ===")
-    converter = PDFToJSONConverter()
-    converter.convert_pdf_to_json_enhanced(
-        str(pdf_file),
-        str(extracted_path),
-        include_images=include_images,
-        image_handling=image_handling,
-    )
-    change_mathematical_to_normal_text(str(extracted_path), str(extracted_path))
-    update_content_types_to_mathematical(str(extracted_path), str(extracted_path))
-    verify_json_structure(str(extracted_path))
+    cache_key = (_file_sha256(pdf_file), include_images, image_handling)
+    extracted_path.parent.mkdir(parents=True, exist_ok=True)
+    # Files are written to a temp sibling and os.replace-d into place, so a
+    # concurrent reader of extracted_path never sees a half-written JSON.
+    with _extraction_lock(cache_key):
+        cached_path, cached_digest = _EXTRACTION_CACHE.get(cache_key, (None, None))
+        if cached_path and Path(cached_path).exists() and _file_sha256(Path(cached_path)) == cached_digest:
+            print(f"♻️  Reusing extracted JSON for identical PDF: {cached_path}")
+            if Path(cached_path).resolve() != extracted_path.resolve():
+                temp_path = _temp_sibling(extracted_path)
+                shutil.copyfile(cached_path, temp_path)
+                os.replace(temp_path, extracted_path)
+        else:
+            temp_path = _temp_sibling(extracted_path)
+            try:
+                converter = PDFToJSONConverter()
+                converter.convert_pdf_to_json_enhanced(
+                    str(pdf_file),
+                    str(temp_path),
+                    include_images=include_images,
+                    image_handling=image_handling,
+                )
+                change_mathematical_to_normal_text(str(temp_path), str(temp_path))
+                update_content_types_to_mathematical(str(temp_path), str(temp_path))
+                verify_json_structure(str(temp_path))
+                os.replace(temp_path, extracted_path)
+            finally:
+                temp_path.unlink(missing_ok=True)
+            _EXTRACTION_CACHE[cache_key] = (str(extracted_path), _file_sha256(extracted_path))
     
     translated_results = []
     generated_pdfs = []
     
-    print("\n=== STEP 2: JSON Translation ===")
-    for lang_code in languages:
-        lang_name = LANG_CODE_TO_NAME.get(lang_code, lang_code.upper())
-        print(f"\n--- Translating into {lang_name} ({lang_code}) ---")
-        translated_path = translate_json_file(
-            str(extracted_path),
-            lang_code,
-            lang_name,
-            output_dir=str(translated_dir_path)
-        )
-        if not translated_path:
-            print(f"⚠️  Translation skipped for {lang_name}")
-            continue
-        translated_results.append(translated_path)
-        
-        if overlay:
+    # Rebuild PDFs on a consumer thread so overlay rendering of one language
+    # overlaps the (network-bound) translation of the next one.
+    render_queue = queue.Queue(maxsize=RENDER_QUEUE_SIZE)
+    
+    def render_worker():
+        while True:
+            job = render_queue.get()
+            if job is None:
+                break
+            lang_name, translated_path, output_pdf = job
             print(f"--- Rebuilding PDF for {lang_name} ---")
-            output_pdf = output_dir_path / f"{pdf_file.stem}_{lang_code}.pdf"
             try:
                 generator = OverlayPDFGenerator(str(translated_path), str(pdf_file), str(output_pdf))
                 generator.generate_pdf()
@@ -2873,6 +2930,34 @@ def run_full_pipeline(pdf_path: str,
             except Exception as pdf_error:
                 print(f"❌ PDF generation failed for {lang_name}: {pdf_error}")
     
+    renderer = threading.Thread(target=render_worker, daemon=True) if overlay else None
+    if renderer:
+        renderer.start()
+    
+    print("\n=== STEP 2: JSON Translation ===")
+    try:
+        for lang_code in languages:
+            lang_name = LANG_CODE_TO_NAME.get(lang_code, lang_code.upper())
+            print(f"\n--- Translating into {lang_name} ({lang_code}) ---")
+            translated_path = translate_json_file(
+                str(extracted_path),
+                lang_code,
+                lang_name,
+                output_dir=str(translated_dir_path)
+            )
+            if not translated_path:
+                print(f"⚠️  Translation skipped for {lang_name}")
+                continue
+            translated_results.append(translated_path)
+            
+            if renderer:
+                output_pdf = output_dir_path / f"{pdf_file.stem}_{lang_code}.pdf"
+                render_queue.put((lang_name, translated_path, output_pdf))
+    finally:
+        if renderer:
+            render_queue.put(None)
+            renderer.join()
+    
     print("\n=== PIPELINE SUMMARY ===")
     print(f"📄 Source PDF        : {pdf_file}")
     print(f"🧾 Extracted JSON    : {extracted_path}")